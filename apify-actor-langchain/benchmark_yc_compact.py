@@ -0,0 +1,99 @@
+"""Benchmark memory usage of `YCCompany` lists vs. `CompactYCCompanies`.
+
+Generates synthetic YC companies shaped like the scraper output and measures the bytes allocated per company
+with `tracemalloc`.
+
+Usage:
+    python benchmark_yc_compact.py [number_of_companies]
+"""
+
+import gc
+import random
+import sys
+import tracemalloc
+
+from src.compact import CompactYCCompanies
+from src.models import YCCompany, YCFounder, YCJob
+
+BATCHES = [f'{season} {year}' for season in ('Winter', 'Summer') for year in range(2015, 2026)]
+STATUSES = ['Active', 'Acquired', 'Inactive', 'Public']
+LOCATIONS = ['San Francisco, CA, USA', 'New York, NY, USA', 'London, UK', 'Remote', 'Bangalore, India']
+TAGS = ['B2B', 'SaaS', 'AI', 'Fintech', 'Developer Tools', 'Healthcare', 'Marketplace', 'Consumer']
+JOB_TITLES = ['Founding Engineer', 'Software Engineer', 'Backend Engineer', 'Product Designer', 'Account Executive']
+
+
+def generate_companies(count: int, seed: int = 42) -> list[dict]:
+    """Generate raw company dicts, so both representations are built from the same data."""
+    rng = random.Random(seed)
+    companies = []
+    for company_id in range(count):
+        companies.append({
+            'company_id': company_id,
+            'company_name': f'Company {company_id}',
+            'batch': rng.choice(BATCHES),
+            'short_description': f'Short description of company {company_id}',
+            'long_description': f'Long description of company {company_id}. ' * 5,
+            'founders': [
+                {'id': company_id * 10 + i, 'name': f'Founder {company_id}-{i}',
+                 'linkedin': f'https://www.linkedin.com/in/founder-{company_id}-{i}'}
+                for i in range(rng.randint(1, 3))
+            ],
+            'team_size': rng.randint(1, 200),
+            'tags': rng.sample(TAGS, rng.randint(1, 3)),
+            'company_location': rng.choice(LOCATIONS),
+            'website': f'https://company{company_id}.com',
+            'url': f'https://www.ycombinator.com/companies/company-{company_id}',
+            'open_jobs': [
+                {'id': company_id * 10 + i, 'title': rng.choice(JOB_TITLES),
+                 'location': rng.choice(LOCATIONS)}
+                for i in range(rng.randint(0, 3))
+            ],
+            'is_hiring': rng.random() < 0.5,
+            'company_linkedin': f'https://www.linkedin.com/company/company-{company_id}',
+            'status': rng.choice(STATUSES),
+            'year_founded': rng.randint(2010, 2025),
+        })
+    return companies
+
+
+def to_model(item: dict) -> YCCompany:
+    """Build a `YCCompany` from a raw company dict."""
+    return YCCompany(
+        **{**item, 'founders': [YCFounder(**founder) for founder in item['founders']],
+           'open_jobs': [YCJob(**job) for job in item['open_jobs']]}
+    )
+
+
+def measure(build) -> tuple[object, int]:
+    """Return the built object and the bytes still allocated after building it."""
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current
+
+
+def main() -> None:
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+    print(f'📊 Benchmarking {count:,} YC companies')
+
+    # Both representations are built from freshly generated data inside the measurement, so all strings
+    # they keep alive are counted. The compact collection only keeps the models alive one at a time.
+    models, models_bytes = measure(lambda: [to_model(item) for item in generate_companies(count)])
+    compact, compact_bytes = measure(
+        lambda: CompactYCCompanies(to_model(item) for item in generate_companies(count))
+    )
+
+    print(f'  list[YCCompany]:      {models_bytes / count:10.1f} bytes/company')
+    print(f'  CompactYCCompanies:   {compact_bytes / count:10.1f} bytes/company')
+    print(f'  Reduction:            {models_bytes / compact_bytes:10.1f}x')
+
+    assert compact[count // 2].to_model() == models[count // 2]
+    print('✓ Round trip OK')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,213 @@
+"""Module defines the per-query budget controller.
+
+A single query can loop through many ReAct steps and every tool call can block on an Actor run for minutes.
+The `QueryBudget` caps wall time, tool calls, Actor compute units and LLM tokens for one query, and the
+`BudgetController` enforces it:
+
+- deadlines are propagated into Actor runs (`timeout_secs` / `wait_secs`),
+- outstanding Actor runs are aborted once the budget is exhausted,
+- the best partial `AgentStructuredOutput` is assembled from the tool results gathered so far.
+
+The active controller is exposed to tools through a context variable, so tools do not need extra arguments
+that the LLM would have to fill in.
+"""
+
+from __future__ import annotations
+
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from apify import Actor
+
+from src.models import AgentStructuredOutput, InstagramPost
+
+# Actor runs shorter than this are pointless, the run would be killed before producing anything.
+MIN_ACTOR_RUN_SECS = 5
+
+TERMINAL_RUN_STATUSES = frozenset({'SUCCEEDED', 'FAILED', 'TIMED-OUT', 'ABORTED'})
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised when a query exceeds one of its budget limits."""
+
+
+@dataclass
+class QueryBudget:
+    """Limits for a single query. `None` means unlimited.
+
+    max_wall_time_secs: Maximum wall time for the whole query.
+    max_tool_calls: Maximum number of tool invocations.
+    max_actor_compute_units: Maximum Apify compute units consumed by Actor runs started from tools.
+    max_tokens: Maximum total LLM tokens (input + output).
+    """
+
+    max_wall_time_secs: float | None = None
+    max_tool_calls: int | None = None
+    max_actor_compute_units: float | None = None
+    max_tokens: int | None = None
+
+    @classmethod
+    def from_input(cls, actor_input: dict) -> QueryBudget:
+        """Create the budget from the Actor input (`maxWallTimeSecs`, `maxToolCalls`, ...)."""
+        return cls(
+            max_wall_time_secs=actor_input.get('maxWallTimeSecs'),
+            max_tool_calls=actor_input.get('maxToolCalls'),
+            max_actor_compute_units=actor_input.get('maxActorComputeUnits'),
+            max_tokens=actor_input.get('maxTokens'),
+        )
+
+
+@dataclass
+class BudgetController:
+    """Tracks usage of a `QueryBudget` and enforces its limits.
+
+    budget: The limits to enforce.
+    started_at: Monotonic time at which the query started.
+    tool_calls: Number of tool calls so far.
+    actor_compute_units: Compute units consumed by finished Actor runs.
+    tokens: LLM tokens consumed so far.
+    exceeded_reason: Human readable reason once a limit was hit, otherwise `None`.
+    """
+
+    budget: QueryBudget
+    started_at: float = field(default_factory=time.monotonic)
+    tool_calls: int = 0
+    actor_compute_units: float = 0.0
+    tokens: int = 0
+    exceeded_reason: str | None = None
+    _outstanding_runs: dict[str, Any] = field(default_factory=dict)
+    _posts: dict[str, InstagramPost] = field(default_factory=dict)
+
+    @property
+    def deadline(self) -> float | None:
+        """Monotonic deadline of the query, or `None` if wall time is unlimited."""
+        if self.budget.max_wall_time_secs is None:
+            return None
+        return self.started_at + self.budget.max_wall_time_secs
+
+    def remaining_secs(self) -> float | None:
+        """Return the remaining wall time in seconds, or `None` if unlimited."""
+        if (deadline := self.deadline) is None:
+            return None
+        return max(0.0, deadline - time.monotonic())
+
+    def check(self) -> None:
+        """Check all limits and record the first one exceeded.
+
+        Raises:
+            BudgetExceededError: If any limit is exceeded.
+        """
+        if self.exceeded_reason is None:
+            budget = self.budget
+            if (remaining := self.remaining_secs()) is not None and remaining <= 0:
+                self.exceeded_reason = f'wall time limit of {budget.max_wall_time_secs}s reached'
+            elif budget.max_tool_calls is not None and self.tool_calls > budget.max_tool_calls:
+                self.exceeded_reason = f'tool call limit of {budget.max_tool_calls} reached'
+            elif (
+                budget.max_actor_compute_units is not None
+                and self.actor_compute_units >= budget.max_actor_compute_units
+            ):
+                self.exceeded_reason = f'Actor compute limit of {budget.max_actor_compute_units} CU reached'
+            elif budget.max_tokens is not None and self.tokens >= budget.max_tokens:
+                self.exceeded_reason = f'token limit of {budget.max_tokens} reached'
+
+        if self.exceeded_reason is not None:
+            raise BudgetExceededError(f'Query budget exceeded: {self.exceeded_reason}')
+
+    @property
+    def exhausted(self) -> bool:
+        """Whether any limit has been exceeded."""
+        try:
+            self.check()
+        except BudgetExceededError:
+            return True
+        return False
+
+    def charge_tool_call(self) -> None:
+        """Count a tool call against the budget.
+
+        Raises:
+            BudgetExceededError: If the call would exceed the budget.
+        """
+        self.check()
+        self.tool_calls += 1
+        self.check()
+
+    def record_tokens(self, message: Any) -> None:
+        """Count tokens reported in the `usage_metadata` of an LLM message."""
+        if usage := getattr(message, 'usage_metadata', None):
+            self.tokens += usage.get('total_tokens', 0)
+
+    def record_posts(self, posts: list[InstagramPost]) -> None:
+        """Keep tool results so a partial output can be built if the budget runs out."""
+        for post in posts:
+            self._posts[post.url] = post
+
+    def partial_output(self) -> AgentStructuredOutput:
+        """Build the best partial structured output from the tool results collected so far."""
+        return AgentStructuredOutput.from_posts(list(self._posts.values()))
+
+    async def call_actor(self, client: Any, actor_id: str, run_input: dict) -> dict | None:
+        """Run an Actor within the remaining budget and wait for it to finish.
+
+        The remaining wall time is passed to the run as its timeout, the run is tracked so it can be aborted,
+        and its compute units are counted once it finishes.
+
+        Args:
+            client: Async Apify client.
+            actor_id: ID of the Actor to run.
+            run_input: Input of the Actor run.
+
+        Returns:
+            dict | None: The finished run, or `None` if the Actor failed to start.
+
+        Raises:
+            BudgetExceededError: If the budget is exhausted before or while the Actor runs.
+        """
+        self.charge_tool_call()
+
+        remaining = self.remaining_secs()
+        timeout_secs = None if remaining is None else max(MIN_ACTOR_RUN_SECS, int(remaining))
+        if not (run := await client.actor(actor_id).start(run_input=run_input, timeout_secs=timeout_secs)):
+            return None
+
+        run_id = run['id']
+        self._outstanding_runs[run_id] = client
+        # Runs interrupted by the deadline (cancellation) or still running after the wait stay tracked,
+        # so `abort_outstanding_runs` can abort them
+        run = await client.run(run_id).wait_for_finish(wait_secs=timeout_secs)
+        if run and run.get('status') in TERMINAL_RUN_STATUSES:
+            self._outstanding_runs.pop(run_id, None)
+
+        if run:
+            self.actor_compute_units += (run.get('stats') or {}).get('computeUnits') or 0.0
+        self.check()
+        return run
+
+    async def abort_outstanding_runs(self) -> None:
+        """Abort all Actor runs started by tools that have not finished yet."""
+        for run_id, client in list(self._outstanding_runs.items()):
+            try:
+                await client.run(run_id).abort()
+                Actor.log.info('Aborted Actor run %s', run_id)
+            except Exception as e:
+                Actor.log.warning(f'Failed to abort Actor run {run_id}: {e}')
+        self._outstanding_runs.clear()
+
+
+_current_budget: ContextVar[BudgetController | None] = ContextVar('current_budget', default=None)
+
+
+def get_budget() -> BudgetController:
+    """Return the controller of the current query, or an unlimited one if none is active."""
+    if (controller := _current_budget.get()) is None:
+        controller = BudgetController(QueryBudget())
+        _current_budget.set(controller)
+    return controller
+
+
+def set_budget(controller: BudgetController) -> None:
+    """Make `controller` the budget of the current query."""
+    _current_budget.set(controller)
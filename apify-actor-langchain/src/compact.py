@@ -0,0 +1,307 @@
+"""Module defines a memory-compact collection of Y Combinator companies.
+
+Holding tens of thousands of `YCCompany` Pydantic objects is expensive: every object carries its own dict,
+its own lists of `YCFounder` / `YCJob` objects, and repeated strings such as `batch`, `status` and `tags`.
+`CompactYCCompanies` stores the same data column by column instead:
+
+- numeric attributes live in `array.array` columns,
+- categorical strings (batch, status, location, tags, job titles, ...) are interned in a `StringPool`
+  and stored as integer codes,
+- founders, jobs and tags are child tables indexed by per-company offsets.
+
+Rows are exposed as lazy `CompanyRow` views, which can still produce a `YCCompany` on demand.
+"""
+
+from __future__ import annotations
+
+import sys
+from array import array
+from collections.abc import Iterable, Iterator
+from typing import overload
+
+from src.models import YCCompany, YCFounder, YCJob
+
+# Code stored in categorical and optional integer columns for missing values
+_MISSING = -1
+
+
+class StringPool:
+    """Interned string pool mapping each distinct string to an integer code."""
+
+    __slots__ = ('_codes', '_strings')
+
+    def __init__(self) -> None:
+        self._strings: list[str] = []
+        self._codes: dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._strings)
+
+    def encode(self, value: str | None) -> int:
+        """Return the code of `value`, adding it to the pool if needed. `None` is encoded as -1."""
+        if value is None:
+            return _MISSING
+        if (code := self._codes.get(value)) is None:
+            code = self._codes[value] = len(self._strings)
+            self._strings.append(value)
+        return code
+
+    def decode(self, code: int) -> str | None:
+        """Return the string for `code`, or `None` for -1."""
+        return None if code == _MISSING else self._strings[code]
+
+    def code_of(self, value: str) -> int | None:
+        """Return the code of `value` without adding it, or `None` if it is not in the pool."""
+        return self._codes.get(value)
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the pool in bytes."""
+        return (
+            sys.getsizeof(self._strings)
+            + sys.getsizeof(self._codes)
+            + sum(sys.getsizeof(string) for string in self._strings)
+        )
+
+
+class CompanyRow:
+    """Lazy view of a single company stored in `CompactYCCompanies`.
+
+    Attributes are decoded from the columns on access, nothing is copied until `to_model()` is called.
+    """
+
+    __slots__ = ('_index', '_table')
+
+    def __init__(self, table: CompactYCCompanies, index: int) -> None:
+        self._table = table
+        self._index = index
+
+    def __repr__(self) -> str:
+        return f'CompanyRow(company_id={self.company_id}, company_name={self.company_name!r})'
+
+    @property
+    def company_id(self) -> int:
+        return self._table._company_id[self._index]
+
+    @property
+    def company_name(self) -> str:
+        return self._table._company_name[self._index]
+
+    @property
+    def batch(self) -> str | None:
+        return self._table._categories.decode(self._table._batch[self._index])
+
+    @property
+    def status(self) -> str | None:
+        return self._table._categories.decode(self._table._status[self._index])
+
+    @property
+    def company_location(self) -> str | None:
+        return self._table._categories.decode(self._table._company_location[self._index])
+
+    @property
+    def short_description(self) -> str | None:
+        return self._table._short_description[self._index]
+
+    @property
+    def long_description(self) -> str | None:
+        return self._table._long_description[self._index]
+
+    @property
+    def team_size(self) -> int | str | None:
+        return self._table._team_size[self._index]
+
+    @property
+    def website(self) -> str | None:
+        return self._table._website[self._index]
+
+    @property
+    def url(self) -> str | None:
+        return self._table._url[self._index]
+
+    @property
+    def company_linkedin(self) -> str | None:
+        return self._table._company_linkedin[self._index]
+
+    @property
+    def is_hiring(self) -> bool:
+        return bool(self._table._is_hiring[self._index])
+
+    @property
+    def year_founded(self) -> int | None:
+        year = self._table._year_founded[self._index]
+        return None if year == _MISSING else year
+
+    @property
+    def tags(self) -> list[str]:
+        table = self._table
+        start, end = table._tag_offsets[self._index], table._tag_offsets[self._index + 1]
+        return [table._categories.decode(code) for code in table._tag_codes[start:end]]
+
+    @property
+    def founders(self) -> list[YCFounder]:
+        table = self._table
+        start, end = table._founder_offsets[self._index], table._founder_offsets[self._index + 1]
+        return [
+            YCFounder(id=table._founder_id[i], name=table._founder_name[i], linkedin=table._founder_linkedin[i])
+            for i in range(start, end)
+        ]
+
+    @property
+    def open_jobs(self) -> list[YCJob]:
+        table = self._table
+        start, end = table._job_offsets[self._index], table._job_offsets[self._index + 1]
+        return [
+            YCJob(
+                id=table._job_id[i],
+                title=table._categories.decode(table._job_title[i]),
+                description=table._job_description[i],
+                location=table._categories.decode(table._job_location[i]),
+            )
+            for i in range(start, end)
+        ]
+
+    def to_model(self) -> YCCompany:
+        """Materialize the row as a `YCCompany`."""
+        return YCCompany(
+            company_id=self.company_id,
+            company_name=self.company_name,
+            batch=self.batch,
+            short_description=self.short_description,
+            long_description=self.long_description,
+            founders=self.founders,
+            team_size=self.team_size,
+            tags=self.tags,
+            company_location=self.company_location,
+            website=self.website,
+            url=self.url,
+            open_jobs=self.open_jobs,
+            is_hiring=self.is_hiring,
+            company_linkedin=self.company_linkedin,
+            status=self.status,
+            year_founded=self.year_founded,
+        )
+
+
+class CompactYCCompanies:
+    """Array-backed columnar collection of `YCCompany` records.
+
+    Intended for bulk, mostly read-only work over large company lists. Use `append()` / `extend()` to add
+    companies and index or iterate the collection to get lazy `CompanyRow` views.
+    """
+
+    def __init__(self, companies: Iterable[YCCompany] = ()) -> None:
+        # One pool for all categorical strings, batches, statuses, locations, tags and job titles overlap a lot
+        self._categories = StringPool()
+
+        self._company_id = array('q')
+        self._company_name: list[str] = []
+        self._batch = array('i')
+        self._status = array('i')
+        self._company_location = array('i')
+        self._short_description: list[str | None] = []
+        self._long_description: list[str | None] = []
+        self._team_size: list[int | str | None] = []
+        self._website: list[str | None] = []
+        self._url: list[str | None] = []
+        self._company_linkedin: list[str | None] = []
+        self._is_hiring = array('b')
+        self._year_founded = array('i')
+
+        # Child tables, rows of company `i` are in `[offsets[i], offsets[i + 1])`
+        self._tag_offsets = array('I', [0])
+        self._tag_codes = array('i')
+
+        self._founder_offsets = array('I', [0])
+        self._founder_id = array('q')
+        self._founder_name: list[str] = []
+        self._founder_linkedin: list[str | None] = []
+
+        self._job_offsets = array('I', [0])
+        self._job_id = array('q')
+        self._job_title = array('i')
+        self._job_description: list[str | None] = []
+        self._job_location = array('i')
+
+        self.extend(companies)
+
+    def __len__(self) -> int:
+        return len(self._company_id)
+
+    @overload
+    def __getitem__(self, index: int) -> CompanyRow: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> list[CompanyRow]: ...
+
+    def __getitem__(self, index: int | slice) -> CompanyRow | list[CompanyRow]:
+        if isinstance(index, slice):
+            return [CompanyRow(self, i) for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('company index out of range')
+        return CompanyRow(self, index)
+
+    def __iter__(self) -> Iterator[CompanyRow]:
+        for index in range(len(self)):
+            yield CompanyRow(self, index)
+
+    def append(self, company: YCCompany) -> None:
+        """Add a company to the collection."""
+        encode = self._categories.encode
+
+        self._company_id.append(company.company_id)
+        self._company_name.append(company.company_name)
+        self._batch.append(encode(company.batch))
+        self._status.append(encode(company.status))
+        self._company_location.append(encode(company.company_location))
+        self._short_description.append(company.short_description)
+        self._long_description.append(company.long_description)
+        self._team_size.append(company.team_size)
+        self._website.append(company.website)
+        self._url.append(company.url)
+        self._company_linkedin.append(company.company_linkedin)
+        self._is_hiring.append(company.is_hiring)
+        self._year_founded.append(_MISSING if company.year_founded is None else company.year_founded)
+
+        self._tag_codes.extend(encode(tag) for tag in company.tags)
+        self._tag_offsets.append(len(self._tag_codes))
+
+        for founder in company.founders:
+            self._founder_id.append(founder.id)
+            self._founder_name.append(founder.name)
+            self._founder_linkedin.append(founder.linkedin)
+        self._founder_offsets.append(len(self._founder_id))
+
+        for job in company.open_jobs:
+            self._job_id.append(job.id)
+            self._job_title.append(encode(job.title))
+            self._job_description.append(job.description)
+            self._job_location.append(encode(job.location))
+        self._job_offsets.append(len(self._job_id))
+
+    def extend(self, companies: Iterable[YCCompany]) -> None:
+        """Add multiple companies to the collection."""
+        for company in companies:
+            self.append(company)
+
+    def to_models(self) -> list[YCCompany]:
+        """Materialize all rows as `YCCompany` objects."""
+        return [row.to_model() for row in self]
+
+    def filter_batch(self, batch: str) -> list[CompanyRow]:
+        """Return the companies of a batch without decoding any other column."""
+        if (code := self._categories.code_of(batch)) is None:
+            return []
+        return [CompanyRow(self, i) for i, batch_code in enumerate(self._batch) if batch_code == code]
+
+    def nbytes(self) -> int:
+        """Approximate memory used by the collection in bytes, including the strings it references."""
+        total = self._categories.nbytes()
+        for column in vars(self).values():
+            if isinstance(column, array):
+                total += sys.getsizeof(column)
+            elif isinstance(column, list):
+                total += sys.getsizeof(column)
+                total += sum(sys.getsizeof(value) for value in column if value is not None)
+        return total
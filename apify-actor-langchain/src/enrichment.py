@@ -0,0 +1,293 @@
+"""Module defines the multi-source company enrichment pipeline.
+
+Each YC company can be enriched from several sources (investors, LinkedIn, Glassdoor, ...). Instead of the
+LLM chaining every lookup one turn at a time, the `EnrichmentPipeline` fans the lookups out concurrently:
+
+- every source is a pluggable `SourceAdapter`,
+- each adapter has its own concurrency limit shared across all companies,
+- adapters declare the sources they depend on (e.g. LinkedIn needs the founders first) and only start
+  once those finished for the same company,
+- results are merged into one `EnrichedYCCompany` per company.
+
+Adapters only see the company and the results of their dependencies, so they can be replaced by local stubs.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from collections.abc import Iterable
+from typing import Any, ClassVar
+
+from apify import Actor
+
+from src.budget import BudgetExceededError, get_budget
+from src.models import EnrichedYCCompany, YCCompany
+
+_GLASSDOOR_REVIEWS_URL_RE = re.compile(r'https?://(?:www\.)?glassdoor\.[a-z.]+/Reviews/[^?#]+-E\d+\.htm')
+
+
+class SourceAdapter(ABC):
+    """A source of enrichment data for a single company.
+
+    name: Name of the source, used as the key in `EnrichedYCCompany.sources`.
+    depends_on: Names of the sources whose results are needed by `fetch`.
+    max_concurrency: Maximum number of concurrent `fetch` calls across all companies.
+    """
+
+    name: ClassVar[str]
+    depends_on: ClassVar[tuple[str, ...]] = ()
+    max_concurrency: ClassVar[int] = 5
+
+    @abstractmethod
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        """Fetch the data of this source for the company.
+
+        Args:
+            company: The company to enrich.
+            dependencies: Results of the sources listed in `depends_on`, keyed by source name.
+
+        Returns:
+            Any: JSON serializable data of this source.
+        """
+
+
+async def run_actor(actor_id: str, run_input: dict, limit: int | None = None) -> list[dict]:
+    """Run an Actor within the query budget and return its dataset items.
+
+    Raises:
+        RuntimeError: If the Actor fails to start.
+    """
+    if not (run := await get_budget().call_actor(Actor.apify_client, actor_id, run_input)):
+        msg = f'Failed to start the Actor {actor_id}'
+        raise RuntimeError(msg)
+    return (await Actor.apify_client.dataset(run['defaultDatasetId']).list_items(limit=limit)).items
+
+
+class FoundersAdapter(SourceAdapter):
+    """Founders of the company, taken from the YC profile or scraped from the company page if missing."""
+
+    name = 'founders'
+
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        if company.founders or not company.url:
+            return [founder.model_dump() for founder in company.founders]
+
+        run_input = {
+            'url': company.url,
+            'scrape_founders': True,
+            'scrape_open_jobs': False,
+            'scrape_all_companies': False,
+        }
+        items = await run_actor('michael.g/y-combinator-scraper', run_input, limit=1)
+        return (items[0].get('founders') or []) if items else []
+
+
+class InvestorsAdapter(SourceAdapter):
+    """Investors focusing on the company's industry tags."""
+
+    name = 'investors'
+    max_concurrency = 3
+
+    def __init__(self, max_results: int = 10) -> None:
+        self.max_results = max_results
+
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        if not company.tags:
+            return []
+        run_input = {
+            'Focus_Areas': company.tags,
+            'Max_Results': self.max_results,
+        }
+        return await run_actor('johnvc/apify-startup-investors-data-scraper', run_input, limit=self.max_results)
+
+
+class LinkedInPostsAdapter(SourceAdapter):
+    """Recent LinkedIn posts of the company's founders."""
+
+    name = 'linkedin'
+    depends_on = ('founders',)
+    max_concurrency = 3
+
+    def __init__(self, max_posts: int = 10) -> None:
+        self.max_posts = max_posts
+
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        posts: dict[str, list[dict]] = {}
+        for founder in dependencies['founders']:
+            if not (match := re.search(r'linkedin\.com/in/([^/?#]+)', founder.get('linkedin') or '')):
+                continue
+            username = match.group(1)
+            run_input = {
+                'profile': username,
+                'Total Posts to Scrape': self.max_posts,
+            }
+            posts[username] = await run_actor('apimaestro/linkedin-profile-posts', run_input, limit=self.max_posts)
+        return posts
+
+
+class GlassdoorUrlAdapter(SourceAdapter):
+    """URL of the company's Glassdoor reviews page, found with a Google search restricted to Glassdoor."""
+
+    name = 'glassdoor_url'
+    max_concurrency = 3
+
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        run_input = {
+            'queries': f'site:glassdoor.com/Reviews "{company.company_name}"',
+            'maxPagesPerQuery': 1,
+            'resultsPerPage': 10,
+        }
+        for item in await run_actor('apify/google-search-scraper', run_input, limit=1):
+            for result in item.get('organicResults') or []:
+                if _GLASSDOOR_REVIEWS_URL_RE.match(url := result.get('url') or ''):
+                    return url
+        msg = f'No Glassdoor reviews page found for {company.company_name}'
+        raise RuntimeError(msg)
+
+
+class GlassdoorReviewsAdapter(SourceAdapter):
+    """Glassdoor employee reviews, scraped from the reviews page found by `GlassdoorUrlAdapter`.
+
+    The reviews scraper needs residential proxies, so this source is not enabled by default.
+    """
+
+    name = 'glassdoor'
+    depends_on = ('glassdoor_url',)
+    max_concurrency = 2
+
+    def __init__(self, max_reviews: int = 20) -> None:
+        self.max_reviews = max_reviews
+
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        run_input = {
+            'startUrls': [{'url': dependencies['glassdoor_url']}],
+            'proxy': {
+                'useApifyProxy': True,
+                'apifyProxyGroups': ['RESIDENTIAL'],
+            },
+        }
+        return await run_actor('memo23/apify-glassdoor-reviews-scraper', run_input, limit=self.max_reviews)
+
+
+# Sources enriched when none are requested explicitly
+DEFAULT_SOURCES = ('founders', 'investors', 'linkedin')
+
+
+def default_adapters() -> list[SourceAdapter]:
+    """Return the adapters of all supported sources."""
+    return [
+        FoundersAdapter(),
+        InvestorsAdapter(),
+        LinkedInPostsAdapter(),
+        GlassdoorUrlAdapter(),
+        GlassdoorReviewsAdapter(),
+    ]
+
+
+def select_adapters(sources: Iterable[str] | None = None) -> list[SourceAdapter]:
+    """Return the adapters of the sources, `DEFAULT_SOURCES` if not given, and of all sources they depend on."""
+    adapters = {adapter.name: adapter for adapter in default_adapters()}
+    wanted: set[str] = set()
+    pending = [name for name in (sources or DEFAULT_SOURCES) if name in adapters]
+    while pending:
+        if (name := pending.pop()) not in wanted:
+            wanted.add(name)
+            pending.extend(adapters[name].depends_on)
+    return [adapter for name, adapter in adapters.items() if name in wanted]
+
+
+class EnrichmentPipeline:
+    """Enriches companies from multiple sources concurrently, respecting source dependencies."""
+
+    def __init__(self, adapters: Iterable[SourceAdapter]) -> None:
+        """Create the pipeline.
+
+        Raises:
+            ValueError: If source names are duplicated, a dependency is unknown or dependencies form a cycle.
+        """
+        self.adapters: dict[str, SourceAdapter] = {}
+        for adapter in adapters:
+            if adapter.name in self.adapters:
+                msg = f'Duplicate enrichment source: {adapter.name}'
+                raise ValueError(msg)
+            self.adapters[adapter.name] = adapter
+
+        for adapter in self.adapters.values():
+            if unknown := set(adapter.depends_on) - set(self.adapters):
+                msg = f'Enrichment source {adapter.name} depends on unknown sources: {sorted(unknown)}'
+                raise ValueError(msg)
+        self._check_cycles()
+
+        self._semaphores = {
+            name: asyncio.Semaphore(adapter.max_concurrency) for name, adapter in self.adapters.items()
+        }
+
+    def _check_cycles(self) -> None:
+        visited: set[str] = set()
+
+        def visit(name: str, path: tuple[str, ...]) -> None:
+            if name in path:
+                msg = f'Enrichment sources form a dependency cycle: {" -> ".join((*path, name))}'
+                raise ValueError(msg)
+            if name in visited:
+                return
+            for dependency in self.adapters[name].depends_on:
+                visit(dependency, (*path, name))
+            visited.add(name)
+
+        for name in self.adapters:
+            visit(name, ())
+
+    async def enrich(self, companies: Iterable[YCCompany]) -> list[EnrichedYCCompany]:
+        """Enrich all companies, returning them in the input order.
+
+        Raises:
+            BudgetExceededError: If the query budget is exhausted, lookups still running are cancelled.
+        """
+        return await _gather_or_cancel([asyncio.create_task(self.enrich_company(company)) for company in companies])
+
+    async def enrich_company(self, company: YCCompany) -> EnrichedYCCompany:
+        """Run all sources for one company, each as soon as its dependencies finished.
+
+        Failures of a source are recorded in `EnrichedYCCompany.errors`, except for an exhausted query budget.
+
+        Raises:
+            BudgetExceededError: If the query budget is exhausted, lookups still running are cancelled.
+        """
+        enriched = EnrichedYCCompany(company=company)
+        tasks: dict[str, asyncio.Task] = {}
+
+        async def run_source(name: str) -> None:
+            adapter = self.adapters[name]
+            await asyncio.gather(*(tasks[dependency] for dependency in adapter.depends_on))
+            if failed := [dependency for dependency in adapter.depends_on if dependency in enriched.errors]:
+                enriched.errors[name] = f'Skipped, dependencies failed: {", ".join(failed)}'
+                return
+
+            dependencies = {dependency: enriched.sources[dependency] for dependency in adapter.depends_on}
+            async with self._semaphores[name]:
+                try:
+                    enriched.sources[name] = await adapter.fetch(company, dependencies)
+                except BudgetExceededError:
+                    raise
+                except Exception as e:
+                    Actor.log.warning(f'Enrichment source {name} failed for {company.company_name}: {e}')
+                    enriched.errors[name] = str(e)
+
+        # Dependencies were validated in `__init__`, all tasks exist before any of them awaits another
+        for name in self.adapters:
+            tasks[name] = asyncio.create_task(run_source(name))
+        await _gather_or_cancel(list(tasks.values()))
+        return enriched
+
+
+async def _gather_or_cancel(tasks: list[asyncio.Task]) -> list[Any]:
+    """Await all tasks, cancelling the remaining ones if any of them fails."""
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -0,0 +1,261 @@
+"""Module defines the in-process index of Y Combinator job postings.
+
+Every company scraped by `tool_scrape_yc_company` has its `open_jobs` added to the `JobIndex` of the current
+query. Each query starts with an empty index, so the index does not grow across queries and a worker never
+returns jobs scraped for an unrelated query.
+The index keeps inverted indexes over title tokens, normalized location parts and company batches, so
+filtered job queries such as "remote backend roles at hiring W25 companies" are answered locally by
+intersecting posting sets instead of handing raw nested job lists to the LLM.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import defaultdict
+from collections.abc import Iterable
+from contextvars import ContextVar
+
+from src.models import YCCompany, YCJob, YCJobPosting
+from src.utils import normalize_yc_batch
+
+_TOKEN_RE = re.compile(r'[a-z0-9+#]+')
+_LOCATION_SPLIT_RE = re.compile(r'\s*[,;/|()]\s*')
+# " or " only separates alternatives between words, "OR" on its own is the Oregon state code
+_LOCATION_ALTERNATIVES_RE = re.compile(r'\s+or\s+')
+
+# Common location spellings mapped onto the form used for indexing
+_LOCATION_ALIASES = {
+    'sf': 'san francisco',
+    'san francisco bay area': 'san francisco',
+    'bay area': 'san francisco',
+    'nyc': 'new york',
+    'new york city': 'new york',
+    'usa': 'us',
+    'united states': 'us',
+    'united states of america': 'us',
+    'uk': 'gb',
+    'united kingdom': 'gb',
+}
+
+# "CA" is both the code of California and of Canada, the other location parts tell which one is meant
+_CANADA_CONTEXT = frozenset({
+    'canada', 'on', 'ontario', 'qc', 'quebec', 'bc', 'british columbia', 'ab', 'alberta',
+    'toronto', 'vancouver', 'montreal', 'ottawa', 'waterloo', 'calgary',
+})
+_CALIFORNIA_CONTEXT = frozenset({
+    'us', 'san francisco', 'los angeles', 'san diego', 'san jose', 'palo alto', 'mountain view', 'menlo park',
+    'redwood city', 'sunnyvale', 'santa clara', 'oakland', 'berkeley',
+})
+
+
+def tokenize_title(title: str) -> set[str]:
+    """Split a job title into lower-cased tokens, e.g. "Back-end Engineer" -> {"backend", "engineer"}."""
+    return set(_TOKEN_RE.findall(title.lower().replace('-', '')))
+
+
+def parse_location(location: str) -> list[list[set[str]]]:
+    """Parse a location into alternatives, each a list of parts, each part the set of its possible meanings.
+
+    For example "San Francisco, CA or Remote" -> [[{"san francisco"}, {"california"}], [{"remote"}]].
+    Any part mentioning "remote" is normalized to "remote". "CA" is resolved to "california" or "canada" from the
+    other parts of its alternative, and to both if they do not tell.
+    """
+    alternatives: list[list[set[str]]] = []
+    for alternative in _LOCATION_ALTERNATIVES_RE.split(location.lower()):
+        parts: list[str] = []
+        for part in _LOCATION_SPLIT_RE.split(alternative):
+            if not (part := part.strip(' .')):
+                continue
+            if 'remote' in part:
+                part = 'remote'
+            parts.append(_LOCATION_ALIASES.get(part, part))
+
+        context = set(parts)
+        meanings: list[set[str]] = []
+        for part in parts:
+            if part != 'ca':
+                meanings.append({part})
+            elif context & _CANADA_CONTEXT:
+                meanings.append({'canada'})
+            elif context & _CALIFORNIA_CONTEXT:
+                meanings.append({'california'})
+            else:
+                meanings.append({'california', 'canada'})
+        if meanings:
+            alternatives.append(meanings)
+    return alternatives
+
+
+def normalize_location(location: str) -> set[str]:
+    """Split a location into normalized parts, e.g. "San Francisco, CA, USA" -> {"san francisco", "california", "us"}.
+
+    See `parse_location` for the normalization rules.
+    """
+    return {meaning for alternative in parse_location(location) for part in alternative for meaning in part}
+
+
+class JobIndex:
+    """Inverted index of YC job postings.
+
+    Postings are stored once, the indexes map title tokens, location parts and batches to posting positions.
+    Re-adding a company replaces its previous postings. Positions freed by removed postings are compacted
+    once they outnumber the live postings.
+    """
+
+    def __init__(self) -> None:
+        self._postings: list[YCJobPosting | None] = []
+        self._by_title_token: defaultdict[str, set[int]] = defaultdict(set)
+        self._by_location: defaultdict[str, set[int]] = defaultdict(set)
+        self._by_batch: defaultdict[str, set[int]] = defaultdict(set)
+        self._hiring: set[int] = set()
+        self._by_company: dict[int, list[int]] = {}
+        # Index sets each posting was added to, so re-added companies can be removed cheaply
+        self._posting_sets: dict[int, list[set[int]]] = {}
+        self._live = 0
+
+    def __len__(self) -> int:
+        return self._live
+
+    def add_companies(self, companies: Iterable[YCCompany]) -> None:
+        """Index the open jobs of the companies."""
+        for company in companies:
+            self._remove_company(company.company_id)
+            positions = self._by_company[company.company_id] = []
+            for job in company.open_jobs:
+                positions.append(self._add_posting(company, job))
+        if len(self._postings) > 2 * self._live:
+            self._compact()
+
+    def _add_posting(self, company: YCCompany, job: YCJob) -> int:
+        position = len(self._postings)
+        posting = YCJobPosting(
+            job_id=job.id,
+            title=job.title,
+            location=job.location,
+            company_id=company.company_id,
+            company_name=company.company_name,
+            batch=company.batch,
+            company_url=company.url,
+        )
+        self._postings.append(posting)
+        self._live += 1
+
+        sets = [self._by_title_token[token] for token in tokenize_title(job.title)]
+        # Jobs without their own location inherit the company location
+        if location := job.location or company.company_location:
+            sets.extend(self._by_location[part] for part in normalize_location(location))
+        if company.batch:
+            sets.append(self._by_batch[normalize_yc_batch(company.batch)])
+        if company.is_hiring:
+            sets.append(self._hiring)
+
+        for positions in sets:
+            positions.add(position)
+        self._posting_sets[position] = sets
+        return position
+
+    def _remove_company(self, company_id: int) -> None:
+        for position in self._by_company.pop(company_id, []):
+            self._postings[position] = None
+            self._live -= 1
+            for positions in self._posting_sets.pop(position):
+                positions.discard(position)
+
+    def _compact(self) -> None:
+        """Drop the freed positions, keeping the indexing order of the live postings."""
+        live_positions = [position for position, posting in enumerate(self._postings) if posting is not None]
+        new_positions = {old: new for new, old in enumerate(live_positions)}
+        self._postings = [posting for posting in self._postings if posting is not None]
+        # Index sets are shared between postings and `_posting_sets`, renumber each of them once in place
+        renumbered: set[int] = set()
+        for sets in self._posting_sets.values():
+            for positions in sets:
+                if id(positions) not in renumbered:
+                    renumbered.add(id(positions))
+                    remapped = {new_positions[position] for position in positions}
+                    positions.clear()
+                    positions.update(remapped)
+        self._posting_sets = {new_positions[old]: sets for old, sets in self._posting_sets.items()}
+        self._by_company = {
+            company_id: [new_positions[position] for position in positions]
+            for company_id, positions in self._by_company.items()
+        }
+        for index in (self._by_title_token, self._by_location, self._by_batch):
+            for key in [key for key, positions in index.items() if not positions]:
+                del index[key]
+
+    def _match_location(self, location: str) -> set[int]:
+        """Return postings matching any alternative of the location, each with all of its parts.
+
+        "San Francisco, USA" only matches postings in San Francisco, not every posting in the US.
+        """
+        matches: set[int] = set()
+        for alternative in parse_location(location):
+            part_matches = [
+                set().union(*(self._by_location.get(meaning, set()) for meaning in meanings))
+                for meanings in alternative
+            ]
+            part_matches.sort(key=len)
+            matches |= part_matches[0].intersection(*part_matches[1:])
+        return matches
+
+    def search(
+        self,
+        title: str | None = None,
+        location: str | None = None,
+        batch: str | None = None,
+        remote_only: bool = False,
+        hiring_only: bool = True,
+        limit: int = 20,
+    ) -> list[YCJobPosting]:
+        """Find postings matching all given filters.
+
+        Args:
+            title: Words that must all appear in the job title.
+            location: Location whose parts must all match the posting location, alternatives can be separated
+                with " or ".
+            batch: YC batch of the company, e.g. "W25" or "Winter 2025".
+            remote_only: Only return remote postings.
+            hiring_only: Only return postings of hiring companies.
+            limit: Maximum number of postings to return.
+
+        Returns:
+            list[YCJobPosting]: Matching postings in the order they were indexed.
+        """
+        candidates: list[set[int]] = []
+        if title:
+            candidates.extend(self._by_title_token.get(token, set()) for token in tokenize_title(title))
+        if location:
+            candidates.append(self._match_location(location))
+        if batch:
+            candidates.append(self._by_batch.get(normalize_yc_batch(batch), set()))
+        if remote_only:
+            candidates.append(self._by_location.get('remote', set()))
+        if hiring_only:
+            candidates.append(self._hiring)
+
+        if candidates:
+            # Intersect starting from the smallest set to keep the work proportional to the result
+            candidates.sort(key=len)
+            positions = set(candidates[0]).intersection(*candidates[1:])
+        else:
+            positions = set(range(len(self._postings)))
+
+        postings = (self._postings[position] for position in sorted(positions))
+        return [posting for posting in postings if posting is not None][:limit]
+
+
+_current_job_index: ContextVar[JobIndex | None] = ContextVar('current_job_index', default=None)
+
+
+def get_job_index() -> JobIndex:
+    """Return the job index of the current query, or a new one if none is active."""
+    if (index := _current_job_index.get()) is None:
+        index = JobIndex()
+        _current_job_index.set(index)
+    return index
+
+
+def set_job_index(index: JobIndex) -> None:
+    """Make `index` the job index of the current query."""
+    _current_job_index.set(index)
@@ -0,0 +1,257 @@
+"""Module defines the durable SQLite-backed queue of research jobs.
+
+Jobs are research queries processed by the workers in `src/worker.py`. The queue lives in a single SQLite
+file, so it survives crashes and can be shared by any number of worker processes on the same host:
+
+- jobs are claimed highest `priority` first, then in insertion order,
+- a claimed job is leased to its worker until the visibility timeout expires; workers extend the lease
+  while they work and a job whose lease expired (crashed worker) becomes visible again,
+- failed jobs are retried with exponential backoff until `max_attempts` is reached.
+
+The database runs in WAL mode, so readers do not block the writer. WAL needs shared memory between the
+processes using the file, so the queue file must be on a local disk of the host running the workers and must not
+be shared between machines over a network file system.
+"""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Literal
+
+from pydantic import BaseModel
+
+DEFAULT_QUEUE_PATH = Path(__file__).parent.parent / 'storage' / 'job_queue.sqlite3'
+
+JobStatus = Literal['queued', 'running', 'succeeded', 'failed']
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    query TEXT NOT NULL,
+    input TEXT NOT NULL DEFAULT '{}',
+    priority INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'queued',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    available_at REAL NOT NULL,
+    lease_owner TEXT,
+    lease_expires_at REAL,
+    result TEXT,
+    error TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority DESC, id);
+"""
+
+
+class Job(BaseModel):
+    """A research job.
+
+    id: Job ID.
+    query: The research query.
+    input: Additional Actor input for the query (e.g., `modelName`, budget limits).
+    priority: Jobs with a higher priority are claimed first.
+    status: One of "queued", "running", "succeeded" and "failed".
+    attempts: Number of times the job was claimed.
+    max_attempts: Number of attempts after which the job fails for good.
+    lease_owner: ID of the worker holding the job while it is running.
+    lease_expires_at: Unix time at which the lease expires and the job becomes visible again.
+    result: Result of a succeeded job.
+    error: Error of the last failed attempt.
+    created_at: Unix time the job was enqueued.
+    updated_at: Unix time the job was last updated.
+    """
+
+    id: int
+    query: str
+    input: dict[str, Any] = {}
+    priority: int = 0
+    status: JobStatus = 'queued'
+    attempts: int = 0
+    max_attempts: int = 3
+    lease_owner: str | None = None
+    lease_expires_at: float | None = None
+    result: dict[str, Any] | None = None
+    error: str | None = None
+    created_at: float
+    updated_at: float
+
+    @classmethod
+    def from_row(cls, row: sqlite3.Row) -> Job:
+        data = dict(row)
+        data['input'] = json.loads(data['input'])
+        data['result'] = json.loads(data['result']) if data['result'] else None
+        data.pop('available_at')
+        return cls(**data)
+
+
+class LeaseLostError(RuntimeError):
+    """Raised when a worker updates a job whose lease it no longer holds."""
+
+
+class JobQueue:
+    """Durable priority queue of research jobs stored in SQLite.
+
+    The queue can be used from several threads (e.g., the workers run every call with `asyncio.to_thread`),
+    access to the connection is serialized by a lock.
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_QUEUE_PATH, retry_backoff_secs: float = 30.0) -> None:
+        self.path = Path(path)
+        self.retry_backoff_secs = retry_backoff_secs
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Autocommit mode, transactions are opened explicitly in `_transaction`
+        self._connection = sqlite3.connect(self.path, timeout=30.0, isolation_level=None, check_same_thread=False)
+        self._lock = threading.RLock()
+        self._connection.row_factory = sqlite3.Row
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._connection.close()
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        with self._lock:
+            # BEGIN IMMEDIATE takes the write lock up front, so two workers can never claim the same job
+            self._connection.execute('BEGIN IMMEDIATE')
+            try:
+                yield self._connection
+            except BaseException:
+                self._connection.execute('ROLLBACK')
+                raise
+            self._connection.execute('COMMIT')
+
+    def enqueue(
+        self, query: str, priority: int = 0, max_attempts: int = 3, actor_input: dict[str, Any] | None = None
+    ) -> int:
+        """Add a research query to the queue and return its job ID."""
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                'INSERT INTO jobs (query, input, priority, max_attempts, available_at, created_at, updated_at) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)',
+                (query, json.dumps(actor_input or {}), priority, max_attempts, now, now, now),
+            )
+        return cursor.lastrowid
+
+    def claim(self, worker_id: str, visibility_timeout_secs: float) -> Job | None:
+        """Lease the next available job to the worker.
+
+        Running jobs whose lease expired are claimable again, or fail if they ran out of attempts.
+
+        Returns:
+            Job | None: The claimed job, or `None` if no job is available.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            connection.execute(
+                "UPDATE jobs SET status = 'failed', error = 'Lease expired after the last attempt', "
+                'lease_owner = NULL, lease_expires_at = NULL, updated_at = ? '
+                "WHERE status = 'running' AND lease_expires_at <= ? AND attempts >= max_attempts",
+                (now, now),
+            )
+            row = connection.execute(
+                'SELECT id FROM jobs '
+                "WHERE (status = 'queued' AND available_at <= ?) "
+                "OR (status = 'running' AND lease_expires_at <= ?) "
+                'ORDER BY priority DESC, id LIMIT 1',
+                (now, now),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE jobs SET status = 'running', attempts = attempts + 1, lease_owner = ?, "
+                'lease_expires_at = ?, updated_at = ? WHERE id = ?',
+                (worker_id, now + visibility_timeout_secs, now, row['id']),
+            )
+            return self._get(connection, row['id'])
+
+    def extend_lease(self, job_id: int, worker_id: str, visibility_timeout_secs: float) -> None:
+        """Keep the job leased to the worker for another visibility timeout.
+
+        Raises:
+            LeaseLostError: If the worker no longer holds the lease.
+        """
+        now = time.time()
+        self._update_leased(
+            job_id, worker_id, 'lease_expires_at = ?, updated_at = ?', (now + visibility_timeout_secs, now)
+        )
+
+    def complete(self, job_id: int, worker_id: str, result: dict[str, Any]) -> None:
+        """Mark the job as succeeded with its result.
+
+        Raises:
+            LeaseLostError: If the worker no longer holds the lease.
+        """
+        self._update_leased(
+            job_id,
+            worker_id,
+            "status = 'succeeded', result = ?, error = NULL, lease_owner = NULL, lease_expires_at = NULL, "
+            'updated_at = ?',
+            (json.dumps(result), time.time()),
+        )
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> None:
+        """Record a failed attempt. The job is retried with backoff until it runs out of attempts.
+
+        Raises:
+            LeaseLostError: If the worker no longer holds the lease.
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            job = self._get(connection, job_id)
+            if job is None or job.status != 'running' or job.lease_owner != worker_id:
+                raise LeaseLostError(f'Worker {worker_id} does not hold the lease of job {job_id}')
+            status = 'failed' if job.attempts >= job.max_attempts else 'queued'
+            available_at = now + self.retry_backoff_secs * 2 ** (job.attempts - 1)
+            connection.execute(
+                'UPDATE jobs SET status = ?, error = ?, available_at = ?, lease_owner = NULL, '
+                'lease_expires_at = NULL, updated_at = ? WHERE id = ?',
+                (status, error, available_at, now, job_id),
+            )
+
+    def get(self, job_id: int) -> Job | None:
+        """Return the job, or `None` if it does not exist."""
+        with self._lock:
+            return self._get(self._connection, job_id)
+
+    def list_jobs(self, status: JobStatus | None = None, limit: int = 100) -> list[Job]:
+        """Return the most recent jobs, optionally filtered by status."""
+        with self._lock:
+            if status is None:
+                rows = self._connection.execute('SELECT * FROM jobs ORDER BY id DESC LIMIT ?', (limit,))
+            else:
+                rows = self._connection.execute(
+                    'SELECT * FROM jobs WHERE status = ? ORDER BY id DESC LIMIT ?', (status, limit)
+                )
+            return [Job.from_row(row) for row in rows]
+
+    def counts(self) -> dict[str, int]:
+        """Return the number of jobs per status."""
+        with self._lock:
+            rows = self._connection.execute('SELECT status, COUNT(*) AS count FROM jobs GROUP BY status')
+            return {row['status']: row['count'] for row in rows}
+
+    @staticmethod
+    def _get(connection: sqlite3.Connection, job_id: int) -> Job | None:
+        row = connection.execute('SELECT * FROM jobs WHERE id = ?', (job_id,)).fetchone()
+        return Job.from_row(row) if row else None
+
+    def _update_leased(self, job_id: int, worker_id: str, assignments: str, parameters: tuple) -> None:
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {assignments} WHERE id = ? AND status = 'running' AND lease_owner = ?",
+                (*parameters, job_id, worker_id),
+            )
+            if cursor.rowcount == 0:
+                raise LeaseLostError(f'Worker {worker_id} does not hold the lease of job {job_id}')
@@ -8,6 +8,7 @@ https://docs.apify.com/sdk/python
 
 from __future__ import annotations
 
+import asyncio
 import logging
 import os
 from pathlib import Path
@@ -15,13 +16,20 @@ from pathlib import Path
 from dotenv import load_dotenv
 from apify import Actor
 from langchain_openai import ChatOpenAI
+from langgraph.graph.state import CompiledStateGraph
 from langgraph.prebuilt import create_react_agent
 
+from src.budget import BudgetController, BudgetExceededError, QueryBudget, set_budget
+from src.job_index import JobIndex, set_job_index
 from src.models import AgentStructuredOutput
+from src.router import run_fast_path, select_model
+from src.sink import ResultSink
 from src.tools import (
     tool_calculator_sum,
+    tool_enrich_yc_companies,
     tool_scrape_instagram_profile_posts,
-    tool_scrape_yc_company
+    tool_scrape_yc_company,
+    tool_search_yc_jobs
 )
 from src.utils import log_state
 
@@ -30,6 +38,108 @@ env_path = Path(__file__).parent.parent / '.env'
 load_dotenv(dotenv_path=env_path)
 
 
+def create_agent_graph(model_name: str) -> CompiledStateGraph:
+    """Create the ReAct agent graph for the model.
+
+    The graph holds no per-query state, so it can be created once and reused for many queries.
+
+    Args:
+        model_name: The OpenAI model to use.
+
+    Returns:
+        CompiledStateGraph: The ReAct agent graph.
+    """
+    llm = ChatOpenAI(model=model_name)
+
+    # Create the ReAct agent graph
+    # see https://langchain-ai.github.io/langgraph/reference/prebuilt/?h=react#langgraph.prebuilt.chat_agent_executor.create_react_agent
+    tools = [
+        tool_calculator_sum,
+        tool_scrape_instagram_profile_posts,
+        tool_scrape_yc_company,
+        tool_search_yc_jobs,
+        tool_enrich_yc_companies
+    ]
+    return create_react_agent(llm, tools, response_format=AgentStructuredOutput)
+
+
+async def run_agent(
+    query: str, graph: CompiledStateGraph, budget: BudgetController
+) -> tuple[AgentStructuredOutput | None, str | None]:
+    """Run the ReAct agent for the query.
+
+    Args:
+        query: The user query.
+        graph: The ReAct agent graph, see `create_agent_graph`.
+        budget: The budget of the query, LLM token usage is counted against it.
+
+    Returns:
+        tuple[AgentStructuredOutput | None, str | None]: The structured response and the last message.
+
+    Raises:
+        BudgetExceededError: If the query budget is exhausted.
+    """
+    inputs: dict = {'messages': [('user', query)]}
+    async for state in graph.astream(inputs, stream_mode='values'):
+        log_state(state)
+        budget.record_tokens(state['messages'][-1])
+        if 'structured_response' in state:
+            return state['structured_response'], state['messages'][-1].content
+        budget.check()
+
+    return None, None
+
+
+async def answer_query(
+    query: str,
+    model_name: str,
+    budget: BudgetController,
+    graphs: dict[str, CompiledStateGraph] | None = None,
+    cheap_model_name: str | None = None,
+) -> tuple[AgentStructuredOutput | None, str | None]:
+    """Answer the query on the fast path or with the ReAct agent, within the budget.
+
+    Args:
+        query: The user query.
+        model_name: The OpenAI model to use for open-ended queries.
+        budget: The budget of the query. It is made the current budget, so tools enforce it too.
+        graphs: Agent graphs per model name, reused between queries. Missing graphs are created and added.
+        cheap_model_name: Optional cheaper model for short queries that almost matched a fast-path route.
+
+    Returns:
+        tuple[AgentStructuredOutput | None, str | None]: The structured response and the last message.
+            If the budget is exceeded, the best partial response is returned.
+    """
+    set_budget(budget)
+    # Jobs scraped for previous queries must not leak into this one
+    set_job_index(JobIndex())
+    graphs = {} if graphs is None else graphs
+
+    try:
+        async with asyncio.timeout(budget.remaining_secs()):
+            # Simple queries are answered with a direct tool call, without invoking the LLM
+            if (routed := await run_fast_path(query)) is not None:
+                Actor.log.info('Answered the query on the fast path')
+                return routed
+
+            model_name = select_model(query, model_name, cheap_model_name)
+            Actor.log.info('Running the ReAct agent with model %s', model_name)
+            if model_name not in graphs:
+                graphs[model_name] = create_agent_graph(model_name)
+            return await run_agent(query, graphs[model_name], budget)
+    except (TimeoutError, BudgetExceededError):
+        # A timeout does not go through `check()`, so record the reason here
+        if not budget.exhausted:
+            budget.exceeded_reason = f'wall time limit of {budget.budget.max_wall_time_secs}s reached'
+        Actor.log.warning('Query budget exceeded: %s', budget.exceeded_reason)
+        await budget.abort_outstanding_runs()
+        last_message = (
+            f'Query budget exceeded ({budget.exceeded_reason}), returning partial results '
+            f'from {budget.tool_calls} tool call(s).'
+        )
+        return budget.partial_output(), last_message
+
+
 async def main() -> None:
     """Define a main entry point for the Apify Actor.
 
@@ -49,6 +159,7 @@ async def main() -> None:
 
         # Try to load previous query
         previous_query = None
+        previous_input: dict = {}
         input_dir = Path(__file__).parent.parent / 'storage' / 'key_value_stores' / 'default'
 
         # Check for both INPUT and INPUT.json (Apify SDK uses INPUT without extension)
@@ -91,6 +202,10 @@ async def main() -> None:
             'modelName': 'gpt-4.1-2025-04-14',
             'debug': True
         }
+        # Keep budget limits and the cheap model configured in the previous input
+        for key in ('maxWallTimeSecs', 'maxToolCalls', 'maxActorComputeUnits', 'maxTokens', 'cheapModelName'):
+            if previous_input.get(key) is not None:
+                actor_input[key] = previous_input[key]
 
         # Save to INPUT.json
         input_dir.mkdir(parents=True, exist_ok=True)
@@ -109,26 +224,10 @@ async def main() -> None:
             msg = 'Missing "query" attribute in input!'
             raise ValueError(msg)
 
-        llm = ChatOpenAI(model=model_name)
-
-        # Create the ReAct agent graph
-        # see https://langchain-ai.github.io/langgraph/reference/prebuilt/?h=react#langgraph.prebuilt.chat_agent_executor.create_react_agent
-        tools = [
-            tool_calculator_sum,
-            tool_scrape_instagram_profile_posts,
-            tool_scrape_yc_company
-        ]
-        graph = create_react_agent(llm, tools, response_format=AgentStructuredOutput)
-
-        inputs: dict = {'messages': [('user', query)]}
-        response: AgentStructuredOutput | None = None
-        last_message: str | None = None
-        async for state in graph.astream(inputs, stream_mode='values'):
-            log_state(state)
-            if 'structured_response' in state:
-                response = state['structured_response']
-                last_message = state['messages'][-1].content
-                break
+        budget = BudgetController(QueryBudget.from_input(actor_input))
+        response, last_message = await answer_query(
+            query, model_name, budget, cheap_model_name=actor_input.get('cheapModelName')
+        )
 
         if not response or not last_message:
             Actor.log.error('Failed to get a response from the ReAct agent!')
@@ -146,15 +245,14 @@ async def main() -> None:
         # Charge for task completion
         await Actor.charge('task-completed')
 
-        # Push results to the key-value store and dataset
-        store = await Actor.open_key_value_store()
-        await store.set_value('response.txt', last_message)
+        # Push results to the key-value store and dataset, the sink flushes them on exit
+        async with ResultSink() as sink:
+            await sink.set_value('response.txt', last_message)
+            await sink.push_data(
+                {
+                    'response': last_message,
+                    'structured_response': response.dict() if response else {},
+                }
+            )
         Actor.log.info('Saved the "response.txt" file into the key-value store!')
-
-        await Actor.push_data(
-            {
-                'response': last_message,
-                'structured_response': response.dict() if response else {},
-            }
-        )
         Actor.log.info('Pushed the into the dataset!')
@@ -7,8 +7,13 @@ Resources:
 
 from __future__ import annotations
 
+from typing import Any
+
 from pydantic import BaseModel
 
+# Number of posts listed in `AgentStructuredOutput.most_popular_posts`
+MOST_POPULAR_POSTS = 5
+
 
 class InstagramPost(BaseModel):
     """Instagram Post Pydantic model.
@@ -45,6 +50,15 @@ class AgentStructuredOutput(BaseModel):
     total_comments: int
     most_popular_posts: list[InstagramPost]
 
+    @classmethod
+    def from_posts(cls, posts: list[InstagramPost], max_popular: int = MOST_POPULAR_POSTS) -> AgentStructuredOutput:
+        """Summarize posts: totals over all of them and the `max_popular` posts with most likes + comments."""
+        return cls(
+            total_likes=sum(post.likes for post in posts),
+            total_comments=sum(post.comments for post in posts),
+            most_popular_posts=sorted(posts, key=lambda post: post.likes + post.comments, reverse=True)[:max_popular],
+        )
+
 
 # ============================================================================
 # Y Combinator Scraper Models
@@ -115,3 +129,41 @@ class YCCompany(BaseModel):
     company_linkedin: str | None = None
     status: str | None = None
     year_founded: int | None = None
+
+
+class YCJobPosting(BaseModel):
+    """Y Combinator job posting joined with its company.
+
+    Returned as a structured output by the `tool_search_yc_jobs` tool.
+
+    Attributes:
+        job_id: Job ID
+        title: Job title
+        location: Job location (optional)
+        company_id: YC company ID
+        company_name: Name of the company
+        batch: YC batch of the company (optional)
+        company_url: YC company profile URL (optional)
+    """
+    job_id: int
+    title: str
+    location: str | None = None
+    company_id: int
+    company_name: str
+    batch: str | None = None
+    company_url: str | None = None
+
+
+class EnrichedYCCompany(BaseModel):
+    """Y Combinator company enriched with data from additional sources.
+
+    Returned as a structured output by the `tool_enrich_yc_companies` tool.
+
+    Attributes:
+        company: The YC company profile
+        sources: Data fetched per source name (e.g., "investors", "linkedin")
+        errors: Error message per source that failed or was skipped
+    """
+    company: YCCompany
+    sources: dict[str, Any] = {}
+    errors: dict[str, str] = {}
@@ -0,0 +1,98 @@
+"""Module defines the local store of scraped Instagram posts.
+
+The content of a published post never changes, only its like and comment counts drift. The store keeps,
+per handle, every post seen so far and the newest post `timestamp`, so repeated scrapes of the same profile
+only fetch posts newer than that (plus an optional bounded window of recent posts whose counts are
+refreshed). Until a full scrape covered the requested number of posts, or reached the end of the profile,
+the profile is scraped in full to backfill older posts. Posts are kept in a named Apify key-value store, so
+they survive between Actor runs.
+"""
+
+from __future__ import annotations
+
+import re
+
+from apify import Actor
+from apify.storages import KeyValueStore
+from pydantic import BaseModel
+
+from src.models import InstagramPost
+
+POST_STORE_NAME = 'instagram-post-store'
+
+
+class InstagramPostHistory(BaseModel):
+    """All posts seen for one Instagram handle.
+
+    newest_timestamp: Timestamp of the newest post seen, `None` if the handle was never scraped.
+    posts: Posts seen so far, keyed by URL.
+    scraped_depth: Largest number of newest posts requested by a full scrape.
+    reached_end: Whether a full scrape returned fewer posts than requested, i.e. reached the oldest post.
+    """
+
+    newest_timestamp: str | None = None
+    posts: dict[str, InstagramPost] = {}
+    scraped_depth: int = 0
+    reached_end: bool = False
+
+    def merge(self, posts: list[InstagramPost]) -> None:
+        """Insert new posts and update the counts of known ones."""
+        for post in posts:
+            self.posts[post.url] = post
+            if self.newest_timestamp is None or post.timestamp > self.newest_timestamp:
+                self.newest_timestamp = post.timestamp
+
+    def latest(self, count: int) -> list[InstagramPost]:
+        """Return the `count` newest posts, newest first."""
+        # ISO 8601 timestamps sort chronologically as strings
+        return sorted(self.posts.values(), key=lambda post: post.timestamp, reverse=True)[:count]
+
+    def refresh_since(self, count: int) -> str | None:
+        """Return the timestamp of the `count`-th newest post, the lower bound for refreshing its counts."""
+        if count <= 0 or not (posts := self.latest(count)):
+            return self.newest_timestamp
+        return posts[-1].timestamp
+
+    def incremental_since(self, max_posts: int, refresh_recent: int = 0) -> str | None:
+        """Return the lower bound timestamp for an incremental scrape, or `None` if a full scrape is needed.
+
+        Incremental scrapes only find new posts, so they are used once a full scrape covered `max_posts` posts
+        or reached the end of the profile. Posts skipped by the scraper (e.g. without likes) do not count
+        against the coverage, so profiles with few usable posts are not scraped in full again and again.
+        """
+        if self.newest_timestamp is None or not (self.reached_end or self.scraped_depth >= max_posts):
+            return None
+        return self.refresh_since(min(refresh_recent, max_posts))
+
+    def record_full_scrape(self, results_limit: int, results: int) -> None:
+        """Record a full scrape that requested `results_limit` posts and got `results` dataset items."""
+        self.scraped_depth = max(self.scraped_depth, results_limit)
+        if results < results_limit:
+            self.reached_end = True
+
+
+class InstagramPostStore:
+    """Per-handle `InstagramPostHistory` persisted in a key-value store."""
+
+    def __init__(self, store: KeyValueStore) -> None:
+        self._store = store
+
+    @classmethod
+    async def open(cls, name: str = POST_STORE_NAME) -> InstagramPostStore:
+        """Open the named key-value store backing the post store."""
+        return cls(await Actor.open_key_value_store(name=name))
+
+    @staticmethod
+    def _key(handle: str) -> str:
+        # Key-value store keys only allow a limited character set
+        return 'handle-' + re.sub(r'[^a-zA-Z0-9_.-]', '-', handle.lower())
+
+    async def get(self, handle: str) -> InstagramPostHistory:
+        """Return the history of the handle, empty if it was never scraped."""
+        if (value := await self._store.get_value(self._key(handle))) is None:
+            return InstagramPostHistory()
+        return InstagramPostHistory.model_validate(value)
+
+    async def save(self, handle: str, history: InstagramPostHistory) -> None:
+        """Persist the history of the handle."""
+        await self._store.set_value(self._key(handle), history.model_dump())
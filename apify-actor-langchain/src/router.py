@@ -0,0 +1,139 @@
+"""Module defines the deterministic fast-path router.
+
+Simple queries such as "What is 100 + 250 + 375?" or "scrape @openai" map directly onto a single tool call
+with obvious arguments. The router detects these intents with regular expressions and dispatches straight to
+the tool, skipping the LLM entirely. Queries that almost matched a route but could not be parsed can
+optionally be sent to a cheaper model, all other queries keep the configured model.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.tools import BaseTool
+
+from src.models import AgentStructuredOutput, InstagramPost, YCCompany
+from src.tools import tool_calculator_sum, tool_scrape_instagram_profile_posts, tool_scrape_yc_company
+from src.utils import normalize_yc_batch
+
+# Queries longer than this are considered open-ended
+SIMPLE_QUERY_MAX_WORDS = 20
+
+_SUM_RE = re.compile(
+    r"^\s*(?:what\s+is|what's|calculate|compute|sum)?\s*"
+    r'(?P<expr>-?\d+(?:\s*\+\s*-?\d+)+)\s*[?=.!]*\s*$',
+    re.IGNORECASE,
+)
+_INSTAGRAM_RE = re.compile(
+    r'^\s*scrape\s+(?:(?:the\s+)?(?:latest|last)\s+)?(?:(?P<count>\d+)\s+posts?\s+(?:from|of|on)\s+)?'
+    r'@(?P<handle>[\w.]+)(?:\s+(?:on\s+)?instagram)?\s*[.!]?\s*$',
+    re.IGNORECASE,
+)
+_YC_BATCH_RE = re.compile(
+    r'^\s*(?:(?:scrape|list|show)\s+)?(?:the\s+)?(?:yc|y\s+combinator)\s+batch\s+'
+    r'(?P<batch>[wsfx]\d{2}|(?:winter|summer|fall|spring)\s+\d{4})\s*(?:companies)?\s*[.!]?\s*$',
+    re.IGNORECASE,
+)
+# Near misses of the routes above: an arithmetic sum, a scrape of a handle or a YC batch listing that
+# could not be parsed, e.g. "add 100 plus 250" or "scrape latest posts of @openai please"
+_NEAR_MISS_RES = (
+    re.compile(r'\d+\s*(?:\+|plus|and)\s*\d+', re.IGNORECASE),
+    re.compile(r'^\s*scrape\b.*@[\w.]+', re.IGNORECASE),
+    re.compile(r'\b(?:yc|y\s+combinator)\s+batch\b', re.IGNORECASE),
+)
+
+
+@dataclass
+class Route:
+    """A query resolved to a single tool call.
+
+    tool: The tool to call.
+    args: The tool arguments.
+    """
+
+    tool: BaseTool
+    args: dict[str, Any]
+
+
+def route_query(query: str) -> Route | None:
+    """Resolve the query to a single tool call, or return `None` if it needs the agent."""
+    if match := _SUM_RE.match(query):
+        numbers = [int(number) for number in re.findall(r'-?\d+', match['expr'])]
+        return Route(tool_calculator_sum, {'numbers': numbers})
+
+    if match := _INSTAGRAM_RE.match(query):
+        args: dict[str, Any] = {'handle': match['handle'].rstrip('.')}
+        if match['count']:
+            args['max_posts'] = int(match['count'])
+        return Route(tool_scrape_instagram_profile_posts, args)
+
+    if match := _YC_BATCH_RE.match(query):
+        batch = normalize_yc_batch(match['batch'])
+        return Route(tool_scrape_yc_company, {'company_url': f'https://www.ycombinator.com/companies?batch={batch}'})
+
+    return None
+
+
+def select_model(query: str, model_name: str, cheap_model_name: str | None = None) -> str:
+    """Pick the model for a query the router could not resolve.
+
+    Args:
+        query: The user query.
+        model_name: The model configured by the caller.
+        cheap_model_name: Optional cheaper model for short queries that almost matched a route.
+            Without it, `model_name` is always used.
+
+    Returns:
+        str: The model to run the agent with.
+    """
+    if (
+        cheap_model_name
+        and len(query.split()) <= SIMPLE_QUERY_MAX_WORDS
+        and any(pattern.search(query) for pattern in _NEAR_MISS_RES)
+    ):
+        return cheap_model_name
+    return model_name
+
+
+def _format_result(result: Any) -> tuple[AgentStructuredOutput, str]:
+    """Turn a raw tool result into the structured output and a textual answer."""
+    empty = AgentStructuredOutput(total_likes=0, total_comments=0, most_popular_posts=[])
+
+    if isinstance(result, int):
+        return empty, f'The sum is {result}.'
+
+    if result and all(isinstance(item, InstagramPost) for item in result):
+        posts: list[InstagramPost] = result
+        # Same summary as the partial output of an exhausted budget
+        response = AgentStructuredOutput.from_posts(posts)
+        message = (
+            f'Scraped {len(posts)} posts with {response.total_likes} likes and {response.total_comments} '
+            f'comments in total. The most popular post is {response.most_popular_posts[0].url}.'
+        )
+        return response, message
+
+    if result and all(isinstance(item, YCCompany) for item in result):
+        companies: list[YCCompany] = result
+        lines = [f'Found {len(companies)} companies:']
+        lines.extend(
+            f'- {company.company_name}: {company.short_description or "no description"}' for company in companies
+        )
+        return empty, '\n'.join(lines)
+
+    return empty, 'The tool returned no results.'
+
+
+async def run_fast_path(query: str) -> tuple[AgentStructuredOutput, str] | None:
+    """Answer the query with a single direct tool call.
+
+    Returns:
+        tuple[AgentStructuredOutput, str] | None: The structured output and textual answer, or `None`
+            if the query must go through the agent.
+    """
+    if (route := route_query(query)) is None:
+        return None
+
+    result = await route.tool.ainvoke(route.args)
+    return _format_result(result)
@@ -0,0 +1,248 @@
+"""Module defines the buffered result sink for dataset and key-value store writes.
+
+`Actor.push_data` and `KeyValueStore.set_value` each cost one API round trip. The `ResultSink` buffers
+dataset records and key-value store entries and flushes them from a background task once a record count,
+byte size or age threshold is reached. Writers are only blocked when the buffer is full (backpressure),
+failed flushes are retried with exponential backoff, and leaving the `async with` block always flushes
+whatever is left. Records and entries a flush fails to write are put back into the buffer, up to
+`max_buffered_records`, and retried by the next flush. `close()` raises if the final flush fails or if any
+record had to be dropped, so a run never ends silently without its results.
+
+Example:
+    async with ResultSink() as sink:
+        await sink.push_data({'response': 'Hello'})
+        await sink.set_value('response.txt', 'Hello')
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from types import TracebackType
+from typing import Any
+
+from apify import Actor
+from apify.storages import Dataset, KeyValueStore
+
+
+@dataclass
+class SinkConfig:
+    """Flush thresholds of a `ResultSink`.
+
+    max_records: Flush once this many records and entries are buffered.
+    max_bytes: Flush once the buffered records and entries reach this JSON size.
+    max_delay_secs: Flush buffered records at the latest after this many seconds.
+    max_buffered_records: Writers wait while this many records and entries are buffered (backpressure). Also
+        bounds the records and entries of failed flushes kept for the next flush.
+    max_retries: Number of retries of a failed write before the flush fails.
+    retry_backoff_secs: Delay before the first retry, doubled on every further retry.
+    """
+
+    max_records: int = 100
+    max_bytes: int = 5 * 1024 * 1024
+    max_delay_secs: float = 2.0
+    max_buffered_records: int = 1000
+    max_retries: int = 3
+    retry_backoff_secs: float = 0.5
+
+
+class ResultSink:
+    """Buffered writer for the Actor's dataset and key-value store."""
+
+    def __init__(
+        self,
+        config: SinkConfig | None = None,
+        dataset: Dataset | None = None,
+        store: KeyValueStore | None = None,
+    ) -> None:
+        self.config = config or SinkConfig()
+        self._dataset = dataset
+        self._store = store
+
+        self._records: list[dict] = []
+        # Later writes to the same key replace earlier ones, only the last value needs to be stored
+        self._values: dict[str, tuple[Any, str | None]] = {}
+        self._buffered_bytes = 0
+        self._oldest_at: float | None = None
+        # Records and entries dropped because failed flushes did not fit back into the buffer
+        self._dropped = 0
+
+        self._flush_needed = asyncio.Event()
+        self._space_available = asyncio.Condition()
+        self._flush_lock = asyncio.Lock()
+        self._worker: asyncio.Task | None = None
+        self._closed = False
+
+    async def __aenter__(self) -> ResultSink:
+        await self.start()
+        return self
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        await self.close()
+
+    @property
+    def buffered(self) -> int:
+        """Number of buffered records and key-value store entries."""
+        return len(self._records) + len(self._values)
+
+    async def start(self) -> None:
+        """Open the storages and start the background flush task."""
+        if self._dataset is None:
+            self._dataset = await Actor.open_dataset()
+        if self._store is None:
+            self._store = await Actor.open_key_value_store()
+        if self._worker is None:
+            self._worker = asyncio.create_task(self._run())
+
+    async def push_data(self, data: dict | list[dict]) -> None:
+        """Buffer one or more dataset records, waiting while the buffer is full."""
+        records = data if isinstance(data, list) else [data]
+        for record in records:
+            await self._wait_for_space()
+            self._records.append(record)
+            self._added(_size(record))
+
+    async def set_value(self, key: str, value: Any, content_type: str | None = None) -> None:
+        """Buffer a key-value store entry, waiting while the buffer is full."""
+        await self._wait_for_space()
+        self._values[key] = (value, content_type)
+        self._added(_size(value))
+
+    async def flush(self) -> None:
+        """Write all buffered records and entries now.
+
+        Raises:
+            RuntimeError: If some records or entries could not be written, even after retries. They are put
+                back into the buffer for the next flush.
+        """
+        async with self._flush_lock:
+            records, self._records = self._records, []
+            values, self._values = self._values, {}
+            self._buffered_bytes = 0
+            self._oldest_at = None
+
+            async with self._space_available:
+                self._space_available.notify_all()
+
+            failed_records: list[dict] = []
+            failed_values: dict[str, tuple[Any, str | None]] = {}
+            if records and not await self._with_retries('push_data', lambda: self._dataset.push_data(records)):
+                failed_records = records
+            for key, (value, content_type) in values.items():
+                if not await self._with_retries(
+                    f'set_value({key})',
+                    lambda key=key, value=value, content_type=content_type: self._store.set_value(
+                        key, value, content_type=content_type
+                    ),
+                ):
+                    failed_values[key] = (value, content_type)
+
+            if failed_records or failed_values:
+                self._requeue(failed_records, failed_values)
+                msg = (
+                    f'ResultSink failed to write {len(failed_records)} dataset record(s) and '
+                    f'{len(failed_values)} key-value store entry(ies)'
+                )
+                raise RuntimeError(msg)
+
+    async def close(self) -> None:
+        """Stop the background task and flush everything that is still buffered.
+
+        Raises:
+            RuntimeError: If the final flush fails, even after retries, or if earlier failed flushes had to
+                drop records or entries.
+        """
+        if self._closed:
+            return
+        self._closed = True
+        if self._worker is not None:
+            # Let the worker finish its current flush instead of cancelling it halfway through a write
+            self._flush_needed.set()
+            await self._worker
+            self._worker = None
+        await self.flush()
+        if self._dropped:
+            msg = f'ResultSink dropped {self._dropped} record(s) and entry(ies) of failed flushes, the buffer was full'
+            raise RuntimeError(msg)
+
+    def _requeue(self, records: list[dict], values: dict[str, tuple[Any, str | None]]) -> None:
+        """Put records and entries of a failed flush back in front of the buffer, as far as they fit."""
+        space = max(0, self.config.max_buffered_records - self.buffered)
+        # Entries written again since the flush are newer than the failed ones
+        values = {key: entry for key, entry in values.items() if key not in self._values}
+        kept_values = dict(list(values.items())[:space])
+        kept_records = records[: space - len(kept_values)]
+        if dropped := len(records) - len(kept_records) + len(values) - len(kept_values):
+            self._dropped += dropped
+            Actor.log.error(f'ResultSink buffer is full, dropping {dropped} record(s) and entry(ies) of a failed flush')
+
+        self._records = kept_records + self._records
+        self._values = {**kept_values, **self._values}
+        self._buffered_bytes += sum(_size(record) for record in kept_records)
+        self._buffered_bytes += sum(_size(value) for value, _ in kept_values.values())
+        # Retry after `max_delay_secs` at the latest
+        if self.buffered and self._oldest_at is None:
+            self._oldest_at = time.monotonic()
+
+    def _added(self, size: int) -> None:
+        self._buffered_bytes += size
+        if self._oldest_at is None:
+            self._oldest_at = time.monotonic()
+        if self.buffered >= self.config.max_records or self._buffered_bytes >= self.config.max_bytes:
+            self._flush_needed.set()
+
+    async def _wait_for_space(self) -> None:
+        if self._closed:
+            msg = 'ResultSink is closed'
+            raise RuntimeError(msg)
+        if self._worker is None:
+            await self.start()
+        async with self._space_available:
+            while self.buffered >= self.config.max_buffered_records:
+                self._flush_needed.set()
+                await self._space_available.wait()
+
+    async def _run(self) -> None:
+        """Flush in the background once a threshold is reached or the oldest record is too old."""
+        while not self._closed:
+            timeout = self.config.max_delay_secs
+            if self._oldest_at is not None:
+                timeout = max(0.0, self._oldest_at + self.config.max_delay_secs - time.monotonic())
+            try:
+                await asyncio.wait_for(self._flush_needed.wait(), timeout=timeout)
+            except TimeoutError:
+                pass
+            self._flush_needed.clear()
+            if self.buffered and not self._closed:
+                try:
+                    await self.flush()
+                except RuntimeError as e:
+                    Actor.log.warning(f'{e}, retrying with the next flush')
+
+    async def _with_retries(self, operation: str, write: Callable[[], Awaitable[Any]]) -> bool:
+        """Run the write, retrying with backoff. Return whether it succeeded."""
+        delay = self.config.retry_backoff_secs
+        for attempt in range(self.config.max_retries + 1):
+            try:
+                await write()
+                return True
+            except Exception as e:
+                if attempt == self.config.max_retries:
+                    Actor.log.error(f'ResultSink {operation} failed after {attempt + 1} attempts: {e}')
+                    return False
+                Actor.log.warning(f'ResultSink {operation} failed (attempt {attempt + 1}), retrying: {e}')
+                await asyncio.sleep(delay)
+                delay *= 2
+
+
+def _size(value: Any) -> int:
+    """Approximate size of a record or entry in bytes."""
+    return len(value) if isinstance(value, (str, bytes)) else len(json.dumps(value, default=str))
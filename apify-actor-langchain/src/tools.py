@@ -14,7 +14,11 @@ from apify import Actor
 from apify_client import ApifyClient
 from langchain_core.tools import tool
 
-from src.models import InstagramPost, YCCompany, YCFounder, YCJob
+from src.budget import get_budget
+from src.enrichment import EnrichmentPipeline, select_adapters
+from src.job_index import get_job_index
+from src.models import EnrichedYCCompany, InstagramPost, YCCompany, YCFounder, YCJob, YCJobPosting
+from src.post_store import InstagramPostStore
 
 
 def get_apify_client() -> ApifyClient:
@@ -41,36 +45,56 @@ def tool_calculator_sum(numbers: list[int]) -> int:
     Returns:
         int: Sum of the numbers.
     """
+    get_budget().charge_tool_call()
     return sum(numbers)
 
 
 @tool
-async def tool_scrape_instagram_profile_posts(handle: str, max_posts: int = 30) -> list[InstagramPost]:
+async def tool_scrape_instagram_profile_posts(
+    handle: str, max_posts: int = 30, refresh_recent: int = 0
+) -> list[InstagramPost]:
     """Tool to scrape Instagram profile posts.
 
+    Posts seen in previous calls are kept in a local post store. Once a previous call scraped at least
+    `max_posts` posts of the handle, or all of its posts, repeated calls only scrape posts published since the
+    newest stored one, otherwise the profile is scraped in full to backfill older posts. Likes and comments of
+    stored posts are the ones seen when the post was scraped, so they are stale unless the post is refreshed
+    with `refresh_recent`.
+
     Args:
         handle (str): Instagram handle of the profile to scrape (without the '@' symbol).
         max_posts (int, optional): Maximum number of posts to scrape. Defaults to 30.
+        refresh_recent (int, optional): Number of most recent stored posts whose likes and comments are
+            scraped again. Defaults to 0, i.e. counts of stored posts are not refreshed.
 
     Returns:
-        list[InstagramPost]: List of Instagram posts scraped from the profile.
+        list[InstagramPost]: List of the latest Instagram posts of the profile, newest first.
 
     Raises:
         RuntimeError: If the Actor fails to start.
+        BudgetExceededError: If the query budget is exhausted.
     """
+    budget = get_budget()
+    post_store = await InstagramPostStore.open()
+    history = await post_store.get(handle)
+
     run_input = {
         'directUrls': [f'https://www.instagram.com/{handle}/'],
         'resultsLimit': max_posts,
         'resultsType': 'posts',
         'searchLimit': 1,
     }
-    if not (run := await Actor.apify_client.actor('apify/instagram-scraper').call(run_input=run_input)):
+    if (since := history.incremental_since(max_posts, refresh_recent)) is not None:
+        run_input['onlyPostsNewerThan'] = since
+        Actor.log.info('Scraping posts of @%s newer than %s', handle, run_input['onlyPostsNewerThan'])
+
+    if not (run := await budget.call_actor(Actor.apify_client, 'apify/instagram-scraper', run_input)):
         msg = 'Failed to start the Actor apify/instagram-scraper'
         raise RuntimeError(msg)
 
     dataset_id = run['defaultDatasetId']
     dataset_items: list[dict] = (await Actor.apify_client.dataset(dataset_id).list_items()).items
-    posts: list[InstagramPost] = []
+    scraped: list[InstagramPost] = []
     for item in dataset_items:
         url: str | None = item.get('url')
         caption: str | None = item.get('caption')
@@ -84,7 +108,7 @@ async def tool_scrape_instagram_profile_posts(handle: str, max_posts: int = 30)
             Actor.log.warning('Skipping post with missing fields: %s', item)
             continue
 
-        posts.append(
+        scraped.append(
             InstagramPost(
                 url=url,
                 likes=likes,
@@ -95,6 +119,13 @@ async def tool_scrape_instagram_profile_posts(handle: str, max_posts: int = 30)
             )
         )
 
+    history.merge(scraped)
+    if since is None:
+        history.record_full_scrape(max_posts, len(dataset_items))
+    await post_store.save(handle, history)
+
+    posts = history.latest(max_posts)
+    budget.record_posts(posts)
     return posts
 
 
@@ -102,26 +133,30 @@ async def tool_scrape_instagram_profile_posts(handle: str, max_posts: int = 30)
 # Y Combinator Scraper Tool
 # ============================================================================
 
-@tool
-async def tool_scrape_yc_company(
+async def scrape_yc_companies(
     company_url: str,
     scrape_founders: bool = True,
-    scrape_jobs: bool = True
+    scrape_jobs: bool = True,
+    max_companies: int | None = None
 ) -> list[YCCompany]:
     """Scrape Y Combinator company data including founders and jobs.
 
+    Open jobs are added to the job index when `scrape_jobs` is set.
+
     Args:
         company_url: URL of the YC company page or batch search (e.g.,
             "https://www.ycombinator.com/companies?batch=W25" or
             "https://www.ycombinator.com/companies/company-name")
         scrape_founders: Whether to scrape founder information
         scrape_jobs: Whether to scrape open job listings
+        max_companies: Maximum number of companies to return, `None` for all
 
     Returns:
         list[YCCompany]: List of YC companies with their profiles, founders, and jobs
 
     Raises:
         RuntimeError: If the Actor fails to start.
+        BudgetExceededError: If the query budget is exhausted.
     """
     run_input = {
         'url': company_url,
@@ -135,16 +170,14 @@ async def tool_scrape_yc_company(
     # Get Apify client
     client = get_apify_client()
 
-    run = await client.actor('michael.g/y-combinator-scraper').call(
-        run_input=run_input
-    )
+    run = await get_budget().call_actor(client, 'michael.g/y-combinator-scraper', run_input)
 
     if not run:
         msg = 'Failed to start the Actor michael.g/y-combinator-scraper'
         raise RuntimeError(msg)
 
     dataset_id = run['defaultDatasetId']
-    dataset_items: list[dict] = (await client.dataset(dataset_id).list_items()).items
+    dataset_items: list[dict] = (await client.dataset(dataset_id).list_items(limit=max_companies)).items
 
     companies: list[YCCompany] = []
 
@@ -215,4 +248,104 @@ async def tool_scrape_yc_company(
             continue
 
     Actor.log.info(f'Successfully scraped {len(companies)} companies')
+    # Without jobs, re-adding the companies would drop their postings indexed by an earlier scrape
+    if scrape_jobs:
+        get_job_index().add_companies(companies)
     return companies
+
+
+@tool
+async def tool_scrape_yc_company(
+    company_url: str,
+    scrape_founders: bool = True,
+    scrape_jobs: bool = True
+) -> list[YCCompany]:
+    """Scrape Y Combinator company data including founders and jobs.
+
+    Args:
+        company_url: URL of the YC company page or batch search (e.g.,
+            "https://www.ycombinator.com/companies?batch=W25" or
+            "https://www.ycombinator.com/companies/company-name")
+        scrape_founders: Whether to scrape founder information
+        scrape_jobs: Whether to scrape open job listings
+
+    Returns:
+        list[YCCompany]: List of YC companies with their profiles, founders, and jobs
+
+    Raises:
+        RuntimeError: If the Actor fails to start.
+        BudgetExceededError: If the query budget is exhausted.
+    """
+    return await scrape_yc_companies(company_url, scrape_founders, scrape_jobs)
+
+
+@tool
+async def tool_enrich_yc_companies(
+    company_url: str,
+    sources: list[str] | None = None,
+    max_companies: int = 10
+) -> list[EnrichedYCCompany]:
+    """Scrape Y Combinator companies and enrich each of them from additional sources in one step.
+
+    All source lookups run concurrently, there is no need to call other tools per company. The companies are
+    scraped without founders and jobs, founders are only looked up for the `max_companies` enriched companies.
+
+    Args:
+        company_url: URL of the YC company page or batch search (e.g.,
+            "https://www.ycombinator.com/companies?batch=W25")
+        sources: Sources to enrich from, any of "founders", "investors", "linkedin" and "glassdoor".
+            Defaults to "founders", "investors" and "linkedin". "linkedin" always includes "founders".
+            "glassdoor" is slower and more expensive (residential proxies), only request it when employee
+            reviews are needed: it first searches for the company's Glassdoor reviews page ("glassdoor_url")
+            and is reported as failed for companies without one.
+        max_companies: Maximum number of companies to enrich
+
+    Returns:
+        list[EnrichedYCCompany]: Companies with the data of each source and errors of failed sources
+
+    Raises:
+        RuntimeError: If the Actor fails to start.
+        BudgetExceededError: If the query budget is exhausted.
+    """
+    adapters = select_adapters(sources)
+    companies = await scrape_yc_companies(
+        company_url, scrape_founders=False, scrape_jobs=False, max_companies=max_companies
+    )
+    return await EnrichmentPipeline(adapters).enrich(companies)
+
+
+@tool
+def tool_search_yc_jobs(
+    title: str | None = None,
+    location: str | None = None,
+    batch: str | None = None,
+    remote_only: bool = False,
+    hiring_only: bool = True,
+    limit: int = 20
+) -> list[YCJobPosting]:
+    """Search open jobs of the Y Combinator companies scraped so far for the current query.
+
+    Companies must be scraped with `tool_scrape_yc_company` first, their open jobs are indexed locally.
+    All given filters must match.
+
+    Args:
+        title: Words that must all appear in the job title (e.g., "backend engineer")
+        location: Job location (e.g., "San Francisco", "Portland, OR", "Remote or New York"), all its
+            comma-separated parts must match
+        batch: YC batch of the company (e.g., "W25" or "Winter 2025")
+        remote_only: Only return remote jobs
+        hiring_only: Only return jobs of companies that are actively hiring
+        limit: Maximum number of jobs to return
+
+    Returns:
+        list[YCJobPosting]: Matching job postings with their company name, batch and URL
+    """
+    get_budget().charge_tool_call()
+    return get_job_index().search(
+        title=title,
+        location=location,
+        batch=batch,
+        remote_only=remote_only,
+        hiring_only=hiring_only,
+        limit=limit,
+    )
@@ -3,6 +3,8 @@ from __future__ import annotations
 from apify import Actor
 from langchain_core.messages import ToolMessage
 
+_YC_SEASON_PREFIXES = {'winter': 'W', 'summer': 'S', 'fall': 'F', 'spring': 'X'}
+
 
 def log_state(state: dict) -> None:
     """Log the state of the graph.
@@ -33,3 +35,19 @@ def log_state(state: dict) -> None:
             Actor.log.debug('-------- Tool Call --------')
             Actor.log.debug('Tool: %s', tool_call['name'])
             Actor.log.debug('Args: %s', tool_call['args'])
+
+
+def normalize_yc_batch(batch: str) -> str:
+    """Normalize a YC batch name to its short form.
+
+    Args:
+        batch: The batch name, e.g. "Winter 2025" or "w25".
+
+    Returns:
+        str: The short batch name, e.g. "W25". Unknown formats are returned upper-cased.
+    """
+    batch = batch.strip()
+    season, _, year = batch.partition(' ')
+    if year and (prefix := _YC_SEASON_PREFIXES.get(season.lower())):
+        return f'{prefix}{year[-2:]}'
+    return batch.upper()
@@ -0,0 +1,206 @@
+"""Module defines the worker pool that processes the research job queue.
+
+Every worker process keeps its agent graphs warm between jobs, claims jobs from the `JobQueue`, extends
+their lease while working on them and stores the result (or error) back in the queue. The queue is the only
+place results are stored: the workers share the local Actor storage, so they neither purge it on start nor
+push to the default dataset, where concurrent processes would overwrite each other's items. Workers run as
+processes on the cores of a single host, see `src/job_queue.py` for why the queue cannot be shared between
+machines. A crashed worker's job is picked up again once its lease expires.
+
+Usage:
+    python -m src.worker enqueue "Research companies in YC W25" --priority 10
+    python -m src.worker work --workers 4
+    python -m src.worker status [JOB_ID]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+from pathlib import Path
+
+from apify import Actor, Configuration
+from langgraph.graph.state import CompiledStateGraph
+
+from src.budget import BudgetController, QueryBudget
+from src.job_queue import DEFAULT_QUEUE_PATH, Job, JobQueue, LeaseLostError
+from src.main import answer_query, create_agent_graph
+
+DEFAULT_MODEL_NAME = 'gpt-4.1-2025-04-14'
+
+
+async def _keep_leased(
+    queue: JobQueue, job: Job, worker_id: str, visibility_timeout_secs: float, task: asyncio.Task
+) -> None:
+    """Extend the lease of the job every third of the visibility timeout until cancelled.
+
+    The SQLite write runs in a thread, so a busy database does not block the event loop. If the lease is lost
+    (e.g., it expired while the database was locked and another worker claimed the job), `task` is cancelled.
+    """
+    while True:
+        await asyncio.sleep(visibility_timeout_secs / 3)
+        try:
+            await asyncio.to_thread(queue.extend_lease, job.id, worker_id, visibility_timeout_secs)
+        except LeaseLostError:
+            Actor.log.warning(f'Worker {worker_id} lost the lease of job {job.id}, cancelling it')
+            task.cancel()
+            return
+
+
+async def process_job(
+    queue: JobQueue,
+    job: Job,
+    worker_id: str,
+    graphs: dict[str, CompiledStateGraph],
+    visibility_timeout_secs: float,
+) -> None:
+    """Answer the query of a claimed job and record the result or the error in the queue."""
+    Actor.log.info(f'Worker {worker_id} processing job {job.id} (attempt {job.attempts}): {job.query}')
+    budget = BudgetController(QueryBudget.from_input(job.input))
+    model_name = job.input.get('modelName', DEFAULT_MODEL_NAME)
+    task = asyncio.create_task(
+        answer_query(job.query, model_name, budget, graphs, cheap_model_name=job.input.get('cheapModelName'))
+    )
+    heartbeat = asyncio.create_task(_keep_leased(queue, job, worker_id, visibility_timeout_secs, task))
+    try:
+        try:
+            response, last_message = await task
+        except asyncio.CancelledError:
+            # Cancelled by the heartbeat, not by a shutdown of the worker itself
+            if heartbeat.done() and not asyncio.current_task().cancelling():
+                await budget.abort_outstanding_runs()
+                raise LeaseLostError(f'Worker {worker_id} does not hold the lease of job {job.id}') from None
+            raise
+        if not response or not last_message:
+            msg = 'Failed to get a response from the ReAct agent!'
+            raise RuntimeError(msg)
+
+        result = {'response': last_message, 'structured_response': response.model_dump()}
+        await asyncio.to_thread(queue.complete, job.id, worker_id, result)
+        await Actor.charge('task-completed')
+        Actor.log.info(f'Job {job.id} succeeded')
+    except LeaseLostError:
+        Actor.log.warning(f'Worker {worker_id} lost the lease of job {job.id}, dropping its result')
+    except Exception as e:
+        Actor.log.exception(f'Job {job.id} failed')
+        try:
+            await asyncio.to_thread(queue.fail, job.id, worker_id, f'{type(e).__name__}: {e}')
+        except LeaseLostError:
+            Actor.log.warning(f'Worker {worker_id} lost the lease of job {job.id}')
+    finally:
+        heartbeat.cancel()
+        task.cancel()
+
+
+async def run_worker(
+    queue_path: Path,
+    visibility_timeout_secs: float = 600.0,
+    poll_interval_secs: float = 2.0,
+    exit_when_empty: bool = False,
+) -> None:
+    """Process jobs from the queue until stopped, or until it is empty if `exit_when_empty` is set."""
+    worker_id = f'{socket.gethostname()}-{os.getpid()}'
+    queue = JobQueue(queue_path)
+
+    # Purging on start would wipe the storage of the workers started earlier
+    async with Actor(Configuration(purge_on_start=False)):
+        # Create the default graph up front, so the first job does not pay for it
+        graphs = {DEFAULT_MODEL_NAME: create_agent_graph(DEFAULT_MODEL_NAME)}
+        Actor.log.info(f'Worker {worker_id} started')
+
+        try:
+            while True:
+                # Queue calls run in a thread, they can wait up to the SQLite busy timeout for the write lock
+                if (job := await asyncio.to_thread(queue.claim, worker_id, visibility_timeout_secs)) is None:
+                    if exit_when_empty:
+                        break
+                    await asyncio.sleep(poll_interval_secs)
+                    continue
+                await process_job(queue, job, worker_id, graphs, visibility_timeout_secs)
+        finally:
+            queue.close()
+
+
+def _worker_process(queue_path: Path, visibility_timeout_secs: float, exit_when_empty: bool) -> None:
+    asyncio.run(run_worker(queue_path, visibility_timeout_secs, exit_when_empty=exit_when_empty))
+
+
+def run_worker_pool(
+    queue_path: Path, workers: int, visibility_timeout_secs: float = 600.0, exit_when_empty: bool = False
+) -> None:
+    """Run `workers` worker processes and wait for them to finish."""
+    context = multiprocessing.get_context('spawn')
+    processes = [
+        context.Process(
+            target=_worker_process,
+            args=(queue_path, visibility_timeout_secs, exit_when_empty),
+            name=f'research-worker-{index}',
+        )
+        for index in range(workers)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        # Jobs of interrupted workers become visible again once their lease expires
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.join()
+
+
+def main() -> None:
+    """Command line interface of the research job queue."""
+    parser = argparse.ArgumentParser(description='Queue research queries and process them with worker processes.')
+    parser.add_argument('--queue', type=Path, default=DEFAULT_QUEUE_PATH, help='Path of the SQLite queue file.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    enqueue_parser = subparsers.add_parser('enqueue', help='Add a research query to the queue.')
+    enqueue_parser.add_argument('query')
+    enqueue_parser.add_argument('--priority', type=int, default=0)
+    enqueue_parser.add_argument('--max-attempts', type=int, default=3)
+    enqueue_parser.add_argument('--model', dest='model_name', default=DEFAULT_MODEL_NAME)
+    enqueue_parser.add_argument('--cheap-model', dest='cheap_model_name')
+    enqueue_parser.add_argument('--max-wall-time-secs', type=int)
+
+    work_parser = subparsers.add_parser('work', help='Process queued jobs.')
+    work_parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    work_parser.add_argument('--visibility-timeout-secs', type=float, default=600.0)
+    work_parser.add_argument('--exit-when-empty', action='store_true')
+
+    status_parser = subparsers.add_parser('status', help='Show job counts, or a single job.')
+    status_parser.add_argument('job_id', type=int, nargs='?')
+
+    args = parser.parse_args()
+
+    if args.command == 'work':
+        run_worker_pool(args.queue, args.workers, args.visibility_timeout_secs, args.exit_when_empty)
+        return
+
+    queue = JobQueue(args.queue)
+    if args.command == 'enqueue':
+        actor_input = {'modelName': args.model_name}
+        if args.cheap_model_name is not None:
+            actor_input['cheapModelName'] = args.cheap_model_name
+        if args.max_wall_time_secs is not None:
+            actor_input['maxWallTimeSecs'] = args.max_wall_time_secs
+        job_id = queue.enqueue(args.query, args.priority, args.max_attempts, actor_input)
+        print(f'✅ Enqueued job {job_id}')
+    elif args.job_id is not None:
+        if (job := queue.get(args.job_id)) is None:
+            print(f'❌ Job {args.job_id} not found')
+        else:
+            print(json.dumps(job.model_dump(), indent=2))
+    else:
+        print(json.dumps(queue.counts(), indent=2))
+    queue.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""Tests of the per-query budget controller, using a stub Apify client."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import src.main
+from src.budget import BudgetController, BudgetExceededError, QueryBudget, get_budget
+
+
+class StubRunClient:
+    def __init__(self, client: StubApifyClient, run_id: str) -> None:
+        self._client = client
+        self._run_id = run_id
+
+    async def wait_for_finish(self, wait_secs: int | None = None) -> dict:
+        await asyncio.sleep(self._client.run_secs)
+        return {'id': self._run_id, 'status': 'SUCCEEDED', 'stats': {'computeUnits': 0.5}}
+
+    async def abort(self) -> None:
+        self._client.aborted.append(self._run_id)
+
+
+class StubActorClient:
+    def __init__(self, client: StubApifyClient) -> None:
+        self._client = client
+
+    async def start(self, run_input: dict, timeout_secs: int | None = None) -> dict:
+        self._client.started_timeouts.append(timeout_secs)
+        return {'id': f'run-{len(self._client.started_timeouts)}'}
+
+
+class StubApifyClient:
+    def __init__(self, run_secs: float) -> None:
+        self.run_secs = run_secs
+        self.aborted: list[str] = []
+        self.started_timeouts: list[int | None] = []
+
+    def actor(self, actor_id: str) -> StubActorClient:
+        return StubActorClient(self)
+
+    def run(self, run_id: str) -> StubRunClient:
+        return StubRunClient(self, run_id)
+
+
+def test_finished_run_is_counted_and_untracked() -> None:
+    client = StubApifyClient(run_secs=0)
+    budget = BudgetController(QueryBudget(max_wall_time_secs=60))
+
+    run = asyncio.run(budget.call_actor(client, 'stub/actor', {}))
+
+    assert run['status'] == 'SUCCEEDED'
+    assert client.started_timeouts == [59]  # remaining wall time, rounded down
+    assert budget.actor_compute_units == 0.5
+    assert budget._outstanding_runs == {}
+
+
+def test_run_interrupted_by_deadline_is_aborted() -> None:
+    client = StubApifyClient(run_secs=10)
+    budget = BudgetController(QueryBudget(max_wall_time_secs=0.5))
+
+    async def run() -> None:
+        with pytest.raises(TimeoutError):
+            async with asyncio.timeout(budget.remaining_secs()):
+                await budget.call_actor(client, 'stub/actor', {})
+        await budget.abort_outstanding_runs()
+
+    asyncio.run(run())
+
+    assert client.aborted == ['run-1']
+    assert budget._outstanding_runs == {}
+
+
+def test_answer_query_aborts_runs_on_wall_time_expiry(monkeypatch: pytest.MonkeyPatch) -> None:
+    client = StubApifyClient(run_secs=10)
+
+    async def slow_fast_path(query: str) -> None:
+        await get_budget().call_actor(client, 'stub/actor', {})
+
+    monkeypatch.setattr(src.main, 'run_fast_path', slow_fast_path)
+    budget = BudgetController(QueryBudget(max_wall_time_secs=0.5))
+
+    response, last_message = asyncio.run(src.main.answer_query('query', 'gpt-4o-mini', budget))
+
+    assert client.aborted == ['run-1']
+    assert response is not None
+    assert response.total_likes == 0
+    assert 'wall time limit' in last_message
+
+
+def test_tool_call_limit() -> None:
+    budget = BudgetController(QueryBudget(max_tool_calls=1))
+    budget.charge_tool_call()
+
+    with pytest.raises(BudgetExceededError):
+        budget.charge_tool_call()
+    assert budget.exhausted
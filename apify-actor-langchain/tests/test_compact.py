@@ -0,0 +1,114 @@
+"""Tests of the columnar YC company collection."""
+
+from __future__ import annotations
+
+import pytest
+
+from src.compact import CompactYCCompanies, StringPool
+from src.models import YCCompany, YCFounder, YCJob
+
+
+def make_companies() -> list[YCCompany]:
+    return [
+        YCCompany(
+            company_id=1,
+            company_name='Acme',
+            batch='Winter 2025',
+            short_description='Rockets',
+            long_description='Reusable rockets',
+            founders=[
+                YCFounder(id=11, name='Ada', linkedin='https://www.linkedin.com/in/ada'),
+                YCFounder(id=12, name='Bob'),
+            ],
+            team_size=12,
+            tags=['Aerospace', 'B2B'],
+            company_location='San Francisco, CA, USA',
+            website='https://acme.example',
+            url='https://www.ycombinator.com/companies/acme',
+            open_jobs=[YCJob(id=101, title='Backend Engineer', description='Python', location='Remote')],
+            is_hiring=True,
+            company_linkedin='https://www.linkedin.com/company/acme',
+            status='Active',
+            year_founded=2024,
+        ),
+        # Every optional attribute missing, no founders, jobs or tags
+        YCCompany(company_id=2, company_name='Globex'),
+        YCCompany(
+            company_id=3,
+            company_name='Initech',
+            batch='Winter 2025',
+            founders=[YCFounder(id=31, name='Carol')],
+            team_size='1-10',
+            tags=['B2B'],
+            open_jobs=[
+                YCJob(id=301, title='Backend Engineer'),
+                YCJob(id=302, title='Designer', location='New York'),
+            ],
+        ),
+    ]
+
+
+def test_round_trip() -> None:
+    companies = make_companies()
+
+    table = CompactYCCompanies(companies)
+
+    assert len(table) == 3
+    assert table.to_models() == companies
+
+
+def test_missing_values_decode_to_none() -> None:
+    row = CompactYCCompanies(make_companies())[1]
+
+    assert row.batch is None
+    assert row.status is None
+    assert row.company_location is None
+    assert row.year_founded is None
+    assert row.team_size is None
+    assert not row.is_hiring
+
+
+def test_companies_without_children_have_empty_offset_ranges() -> None:
+    table = CompactYCCompanies(make_companies())
+
+    assert table[1].founders == []
+    assert table[1].open_jobs == []
+    assert table[1].tags == []
+    # The children of the following company are not shifted by the empty ranges
+    assert [founder.name for founder in table[2].founders] == ['Carol']
+    assert [job.id for job in table[2].open_jobs] == [301, 302]
+    assert table[2].tags == ['B2B']
+
+
+def test_negative_and_slice_indexing() -> None:
+    table = CompactYCCompanies(make_companies())
+
+    assert table[-1].company_id == 3
+    assert table[-3].company_id == 1
+    assert [row.company_id for row in table[1:]] == [2, 3]
+    assert [row.company_id for row in table[::-1]] == [3, 2, 1]
+    assert table[5:] == []
+    with pytest.raises(IndexError):
+        table[3]
+    with pytest.raises(IndexError):
+        table[-4]
+
+
+def test_filter_batch() -> None:
+    table = CompactYCCompanies(make_companies())
+
+    assert [row.company_id for row in table.filter_batch('Winter 2025')] == [1, 3]
+    assert table.filter_batch('Summer 2030') == []
+    # Looking up an unknown batch does not add it to the pool
+    assert table._categories.code_of('Summer 2030') is None
+
+
+def test_string_pool() -> None:
+    pool = StringPool()
+
+    assert pool.encode('B2B') == pool.encode('B2B') == 0
+    assert pool.encode(None) == -1
+    assert pool.decode(0) == 'B2B'
+    assert pool.decode(-1) is None
+    assert len(pool) == 1
+
@@ -0,0 +1,172 @@
+"""Tests of the enrichment pipeline, using stub source adapters."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+import src.enrichment
+from src.budget import BudgetExceededError
+from src.enrichment import EnrichmentPipeline, SourceAdapter, select_adapters
+from src.models import YCCompany
+
+
+class StubAdapter(SourceAdapter):
+    """Adapter returning a fixed value after a delay, recording the order and concurrency of its calls."""
+
+    def __init__(
+        self,
+        name: str,
+        depends_on: tuple[str, ...] = (),
+        max_concurrency: int = 5,
+        delay_secs: float = 0.01,
+        error: Exception | None = None,
+        events: list[str] | None = None,
+    ) -> None:
+        self.name = name
+        self.depends_on = depends_on
+        self.max_concurrency = max_concurrency
+        self.delay_secs = delay_secs
+        self.error = error
+        self.events = events if events is not None else []
+        self.running = 0
+        self.max_running = 0
+        self.received: list[dict[str, Any]] = []
+
+    async def fetch(self, company: YCCompany, dependencies: dict[str, Any]) -> Any:
+        self.received.append(dependencies)
+        self.events.append(f'{self.name}:start')
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(self.delay_secs)
+        finally:
+            self.running -= 1
+        self.events.append(f'{self.name}:end')
+        if self.error is not None:
+            raise self.error
+        return f'{self.name} of {company.company_name}'
+
+
+def make_companies(count: int) -> list[YCCompany]:
+    return [YCCompany(company_id=index, company_name=f'company-{index}') for index in range(count)]
+
+
+def test_dependent_source_runs_after_its_dependency() -> None:
+    events: list[str] = []
+    founders = StubAdapter('founders', delay_secs=0.05, events=events)
+    linkedin = StubAdapter('linkedin', depends_on=('founders',), events=events)
+    investors = StubAdapter('investors', events=events)
+
+    [enriched] = asyncio.run(EnrichmentPipeline([linkedin, founders, investors]).enrich(make_companies(1)))
+
+    assert events.index('linkedin:start') > events.index('founders:end')
+    # Independent sources do not wait for the slow one
+    assert events.index('investors:end') < events.index('founders:end')
+    assert linkedin.received == [{'founders': 'founders of company-0'}]
+    assert enriched.sources == {
+        'founders': 'founders of company-0',
+        'linkedin': 'linkedin of company-0',
+        'investors': 'investors of company-0',
+    }
+    assert enriched.errors == {}
+
+
+def test_concurrency_limit_is_shared_across_companies() -> None:
+    glassdoor = StubAdapter('glassdoor', max_concurrency=2)
+    investors = StubAdapter('investors', max_concurrency=5)
+
+    results = asyncio.run(EnrichmentPipeline([glassdoor, investors]).enrich(make_companies(8)))
+
+    assert glassdoor.max_running == 2
+    assert investors.max_running == 5
+    assert [enriched.company.company_id for enriched in results] == list(range(8))
+
+
+def test_source_is_skipped_when_a_dependency_failed() -> None:
+    founders = StubAdapter('founders', error=RuntimeError('no founders'))
+    linkedin = StubAdapter('linkedin', depends_on=('founders',))
+    investors = StubAdapter('investors')
+
+    [enriched] = asyncio.run(EnrichmentPipeline([founders, linkedin, investors]).enrich(make_companies(1)))
+
+    assert linkedin.received == []
+    assert enriched.errors == {
+        'founders': 'no founders',
+        'linkedin': 'Skipped, dependencies failed: founders',
+    }
+    assert enriched.sources == {'investors': 'investors of company-0'}
+
+
+def test_budget_exhaustion_stops_the_pipeline() -> None:
+    founders = StubAdapter('founders', error=BudgetExceededError('Query budget exceeded: tool call limit'))
+    glassdoor = StubAdapter('glassdoor', delay_secs=10)
+
+    async def enrich() -> None:
+        await asyncio.wait_for(EnrichmentPipeline([founders, glassdoor]).enrich(make_companies(2)), timeout=5)
+
+    with pytest.raises(BudgetExceededError):
+        asyncio.run(enrich())
+    assert glassdoor.running == 0
+
+
+@pytest.mark.parametrize(
+    'adapters',
+    [
+        [StubAdapter('founders'), StubAdapter('founders')],
+        [StubAdapter('linkedin', depends_on=('founders',))],
+        [StubAdapter('a', depends_on=('b',)), StubAdapter('b', depends_on=('a',))],
+    ],
+)
+def test_invalid_adapters_are_rejected(adapters: list[SourceAdapter]) -> None:
+    with pytest.raises(ValueError):
+        EnrichmentPipeline(adapters)
+
+
+def test_select_adapters_adds_dependencies_and_leaves_glassdoor_out_by_default() -> None:
+    assert [adapter.name for adapter in select_adapters()] == ['founders', 'investors', 'linkedin']
+    assert [adapter.name for adapter in select_adapters(['linkedin'])] == ['founders', 'linkedin']
+    assert [adapter.name for adapter in select_adapters(['glassdoor'])] == ['glassdoor_url', 'glassdoor']
+
+
+def test_glassdoor_reviews_are_scraped_from_the_resolved_reviews_url(monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[tuple[str, dict]] = []
+
+    async def stub_run_actor(actor_id: str, run_input: dict, limit: int | None = None) -> list[dict]:
+        calls.append((actor_id, run_input))
+        if actor_id == 'apify/google-search-scraper':
+            return [{'organicResults': [
+                {'url': 'https://www.glassdoor.com/Overview/Working-at-Acme-EI_IE1234567.htm'},
+                {'url': 'https://www.glassdoor.com/Reviews/Acme-Reviews-E1234567.htm'},
+            ]}]
+        return [{'reviewId': '1'}]
+
+    monkeypatch.setattr(src.enrichment, 'run_actor', stub_run_actor)
+
+    [enriched] = asyncio.run(EnrichmentPipeline(select_adapters(['glassdoor'])).enrich(make_companies(1)))
+
+    assert enriched.errors == {}
+    assert enriched.sources['glassdoor'] == [{'reviewId': '1'}]
+    assert calls[1] == (
+        'memo23/apify-glassdoor-reviews-scraper',
+        {
+            'startUrls': [{'url': 'https://www.glassdoor.com/Reviews/Acme-Reviews-E1234567.htm'}],
+            'proxy': {'useApifyProxy': True, 'apifyProxyGroups': ['RESIDENTIAL']},
+        },
+    )
+
+
+def test_glassdoor_is_skipped_without_a_reviews_page(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def stub_run_actor(actor_id: str, run_input: dict, limit: int | None = None) -> list[dict]:
+        return [{'organicResults': []}]
+
+    monkeypatch.setattr(src.enrichment, 'run_actor', stub_run_actor)
+
+    [enriched] = asyncio.run(EnrichmentPipeline(select_adapters(['glassdoor'])).enrich(make_companies(1)))
+
+    assert enriched.errors == {
+        'glassdoor_url': 'No Glassdoor reviews page found for company-0',
+        'glassdoor': 'Skipped, dependencies failed: glassdoor_url',
+    }
@@ -0,0 +1,116 @@
+"""Tests of the YC job posting index."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+import src.main
+from src.budget import BudgetController, QueryBudget
+from src.job_index import JobIndex, get_job_index, normalize_location
+from src.models import AgentStructuredOutput, YCCompany, YCJob
+
+
+def make_company(company_id: int, titles: list[str], location: str = 'San Francisco, CA, USA') -> YCCompany:
+    return YCCompany(
+        company_id=company_id,
+        company_name=f'company-{company_id}',
+        batch='Winter 2025',
+        company_location=location,
+        is_hiring=True,
+        open_jobs=[YCJob(id=company_id * 100 + index, title=title) for index, title in enumerate(titles)],
+    )
+
+
+def test_search_filters() -> None:
+    index = JobIndex()
+    index.add_companies([
+        make_company(1, ['Backend Engineer', 'Designer']),
+        make_company(2, ['Back-end Engineer'], location='Remote'),
+    ])
+
+    assert [posting.job_id for posting in index.search(title='backend engineer')] == [100, 200]
+    assert [posting.job_id for posting in index.search(title='backend', remote_only=True)] == [200]
+    assert [posting.job_id for posting in index.search(location='SF', batch='W25')] == [100, 101]
+    assert index.search(batch='S24') == []
+
+
+def test_re_added_companies_are_replaced_and_freed_positions_compacted() -> None:
+    index = JobIndex()
+    index.add_companies([make_company(1, ['Engineer']), make_company(2, ['Designer', 'Engineer'])])
+
+    for _ in range(10):
+        index.add_companies([make_company(2, ['Designer', 'Engineer'])])
+
+    assert len(index) == 3
+    assert len(index._postings) <= 2 * len(index)
+    assert [posting.job_id for posting in index.search()] == [100, 200, 201]
+    assert [posting.job_id for posting in index.search(title='engineer')] == [100, 201]
+
+    index.add_companies([make_company(2, [])])
+
+    assert len(index) == 1
+    assert [posting.job_id for posting in index.search(title='engineer', location='us')] == [100]
+
+
+def test_each_query_starts_with_an_empty_index(monkeypatch: pytest.MonkeyPatch) -> None:
+    async def scrape_then_search(query: str) -> tuple[AgentStructuredOutput, str]:
+        found = get_job_index().search(title='engineer')
+        get_job_index().add_companies([make_company(1, ['Engineer'])])
+        return AgentStructuredOutput(total_likes=0, total_comments=0, most_popular_posts=[]), str(len(found))
+
+    monkeypatch.setattr(src.main, 'run_fast_path', scrape_then_search)
+
+    async def answer_twice() -> list[str]:
+        messages = []
+        for _ in range(2):
+            _, message = await src.main.answer_query('query', 'gpt-4o-mini', BudgetController(QueryBudget()))
+            messages.append(message)
+        return messages
+
+    # Jobs indexed by the first query are not visible to the second one
+    assert asyncio.run(answer_twice()) == ['0', '0']
+
+
+@pytest.mark.parametrize(
+    ('location', 'parts'),
+    [
+        ('San Francisco, CA, USA', {'san francisco', 'california', 'us'}),
+        ('Toronto, ON, CA', {'toronto', 'on', 'canada'}),
+        ('Vancouver, CA', {'vancouver', 'canada'}),
+        ('Fresno, CA', {'fresno', 'california', 'canada'}),
+        ('Remote (US)', {'remote', 'us'}),
+        ('Portland, OR, USA', {'portland', 'or', 'us'}),
+        ('OR', {'or'}),
+        ('Remote or Portland', {'remote', 'portland'}),
+    ],
+)
+def test_normalize_location(location: str, parts: set[str]) -> None:
+    assert normalize_location(location) == parts
+
+
+def test_search_tells_california_from_canada() -> None:
+    index = JobIndex()
+    index.add_companies([
+        make_company(1, ['Engineer'], location='San Francisco, CA, USA'),
+        make_company(2, ['Engineer'], location='Toronto, ON, CA'),
+    ])
+
+    assert [posting.company_id for posting in index.search(location='California')] == [1]
+    assert [posting.company_id for posting in index.search(location='Canada')] == [2]
+    assert [posting.company_id for posting in index.search(location='CA')] == [1, 2]
+
+
+def test_search_matches_every_part_of_a_location() -> None:
+    index = JobIndex()
+    index.add_companies([
+        make_company(1, ['Engineer'], location='New York, NY, USA'),
+        make_company(2, ['Engineer'], location='San Francisco, CA, USA'),
+        make_company(3, ['Engineer'], location='Remote'),
+    ])
+
+    assert [posting.company_id for posting in index.search(location='San Francisco, USA')] == [2]
+    assert index.search(location='Portland, USA') == []
+    assert [posting.company_id for posting in index.search(location='USA')] == [1, 2]
+    assert [posting.company_id for posting in index.search(location='Remote or NYC')] == [1, 3]
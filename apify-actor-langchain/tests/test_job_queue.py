@@ -0,0 +1,161 @@
+"""Tests of the SQLite job queue, using a fake clock."""
+
+from __future__ import annotations
+
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+
+import src.job_queue
+from src.job_queue import JobQueue, LeaseLostError
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1_000_000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(src.job_queue, 'time', clock)
+    return clock
+
+
+@pytest.fixture
+def queue(tmp_path: Path, clock: FakeClock) -> Iterator[JobQueue]:
+    queue = JobQueue(tmp_path / 'queue.sqlite3', retry_backoff_secs=10)
+    yield queue
+    queue.close()
+
+
+def test_jobs_are_claimed_by_priority_then_in_insertion_order(queue: JobQueue) -> None:
+    low = queue.enqueue('low')
+    first_high = queue.enqueue('first high', priority=5)
+    second_high = queue.enqueue('second high', priority=5)
+
+    claimed = [queue.claim('worker', visibility_timeout_secs=60).id for _ in range(3)]
+
+    assert claimed == [first_high, second_high, low]
+    assert queue.claim('worker', visibility_timeout_secs=60) is None
+
+
+def test_claim_leases_the_job(queue: JobQueue, clock: FakeClock) -> None:
+    job_id = queue.enqueue('query', actor_input={'modelName': 'gpt-4.1'})
+
+    job = queue.claim('worker', visibility_timeout_secs=60)
+
+    assert job.id == job_id
+    assert job.status == 'running'
+    assert job.attempts == 1
+    assert job.lease_owner == 'worker'
+    assert job.lease_expires_at == clock.now + 60
+    assert job.input == {'modelName': 'gpt-4.1'}
+
+
+def test_complete_stores_the_result(queue: JobQueue) -> None:
+    job_id = queue.enqueue('query')
+    queue.claim('worker', visibility_timeout_secs=60)
+
+    queue.complete(job_id, 'worker', {'response': 'done'})
+
+    job = queue.get(job_id)
+    assert job.status == 'succeeded'
+    assert job.result == {'response': 'done'}
+    assert job.lease_owner is None
+    assert queue.counts() == {'succeeded': 1}
+
+
+def test_failed_job_is_retried_with_exponential_backoff(queue: JobQueue, clock: FakeClock) -> None:
+    job_id = queue.enqueue('query', max_attempts=3)
+
+    queue.claim('worker', visibility_timeout_secs=60)
+    queue.fail(job_id, 'worker', 'first error')
+    job = queue.get(job_id)
+    assert job.status == 'queued'
+    assert job.error == 'first error'
+    # Not available before the backoff of 10s passed
+    clock.now += 9
+    assert queue.claim('worker', visibility_timeout_secs=60) is None
+    clock.now += 1
+    assert queue.claim('worker', visibility_timeout_secs=60).attempts == 2
+
+    # The backoff doubles with every attempt
+    queue.fail(job_id, 'worker', 'second error')
+    clock.now += 19
+    assert queue.claim('worker', visibility_timeout_secs=60) is None
+    clock.now += 1
+    assert queue.claim('worker', visibility_timeout_secs=60).attempts == 3
+
+
+def test_job_fails_for_good_after_max_attempts(queue: JobQueue, clock: FakeClock) -> None:
+    job_id = queue.enqueue('query', max_attempts=2)
+
+    for _ in range(2):
+        queue.claim('worker', visibility_timeout_secs=60)
+        queue.fail(job_id, 'worker', 'boom')
+        clock.now += 1000
+
+    job = queue.get(job_id)
+    assert job.status == 'failed'
+    assert job.error == 'boom'
+    assert queue.claim('worker', visibility_timeout_secs=60) is None
+
+
+def test_expired_lease_is_claimed_again(queue: JobQueue, clock: FakeClock) -> None:
+    job_id = queue.enqueue('query')
+    queue.claim('crashed-worker', visibility_timeout_secs=60)
+
+    clock.now += 59
+    assert queue.claim('worker', visibility_timeout_secs=60) is None
+    clock.now += 1
+    job = queue.claim('worker', visibility_timeout_secs=60)
+
+    assert job.id == job_id
+    assert job.lease_owner == 'worker'
+    assert job.attempts == 2
+    # The crashed worker can no longer update the job
+    with pytest.raises(LeaseLostError):
+        queue.complete(job_id, 'crashed-worker', {})
+    with pytest.raises(LeaseLostError):
+        queue.fail(job_id, 'crashed-worker', 'late error')
+
+
+def test_extended_lease_is_not_claimed(queue: JobQueue, clock: FakeClock) -> None:
+    queue.enqueue('query')
+    job = queue.claim('worker', visibility_timeout_secs=60)
+
+    clock.now += 50
+    queue.extend_lease(job.id, 'worker', visibility_timeout_secs=60)
+    clock.now += 50
+
+    assert queue.claim('other-worker', visibility_timeout_secs=60) is None
+    with pytest.raises(LeaseLostError):
+        queue.extend_lease(job.id, 'other-worker', visibility_timeout_secs=60)
+
+
+def test_lease_expired_after_the_last_attempt_fails_the_job(queue: JobQueue, clock: FakeClock) -> None:
+    job_id = queue.enqueue('query', max_attempts=1)
+    queue.claim('crashed-worker', visibility_timeout_secs=60)
+
+    clock.now += 60
+    assert queue.claim('worker', visibility_timeout_secs=60) is None
+
+    job = queue.get(job_id)
+    assert job.status == 'failed'
+    assert job.error == 'Lease expired after the last attempt'
+    assert job.lease_owner is None
+
+
+def test_list_jobs_filters_by_status(queue: JobQueue) -> None:
+    first = queue.enqueue('first')
+    second = queue.enqueue('second')
+    queue.claim('worker', visibility_timeout_secs=60)
+
+    assert [job.id for job in queue.list_jobs()] == [second, first]
+    assert [job.id for job in queue.list_jobs('queued')] == [second]
+    assert queue.counts() == {'queued': 1, 'running': 1}
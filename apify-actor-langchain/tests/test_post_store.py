@@ -0,0 +1,138 @@
+"""Tests of the Instagram post history and the incremental scraping of the Instagram tool."""
+
+from __future__ import annotations
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+from apify import Actor
+
+import src.tools
+from src.models import InstagramPost
+from src.post_store import InstagramPostHistory
+from src.tools import tool_scrape_instagram_profile_posts
+
+
+def make_post(day: int, likes: int = 10) -> InstagramPost:
+    return InstagramPost(
+        url=f'https://www.instagram.com/p/{day}/', likes=likes, comments=1, timestamp=f'2025-01-{day:02d}T00:00:00.000Z'
+    )
+
+
+def test_merge_inserts_new_posts_and_updates_known_ones() -> None:
+    history = InstagramPostHistory()
+    history.merge([make_post(1), make_post(3)])
+    history.merge([make_post(2), make_post(3, likes=99)])
+
+    assert history.newest_timestamp == '2025-01-03T00:00:00.000Z'
+    assert len(history.posts) == 3
+    assert history.posts['https://www.instagram.com/p/3/'].likes == 99
+
+
+def test_latest_returns_newest_posts_first() -> None:
+    history = InstagramPostHistory()
+    history.merge([make_post(2), make_post(5), make_post(1), make_post(4)])
+
+    assert [post.url for post in history.latest(2)] == [
+        'https://www.instagram.com/p/5/',
+        'https://www.instagram.com/p/4/',
+    ]
+    assert len(history.latest(10)) == 4
+
+
+def test_refresh_since() -> None:
+    history = InstagramPostHistory()
+    history.merge([make_post(day) for day in range(1, 6)])
+
+    assert history.refresh_since(0) == '2025-01-05T00:00:00.000Z'
+    assert history.refresh_since(3) == '2025-01-03T00:00:00.000Z'
+    assert history.refresh_since(10) == '2025-01-01T00:00:00.000Z'
+
+
+def test_backfill_until_a_full_scrape_covered_max_posts() -> None:
+    history = InstagramPostHistory()
+    assert history.incremental_since(30) is None
+
+    history.merge([make_post(day) for day in range(1, 11)])
+    history.record_full_scrape(results_limit=10, results=10)
+    # More posts requested than covered so far: backfill
+    assert history.incremental_since(30) is None
+    assert history.incremental_since(10) == '2025-01-10T00:00:00.000Z'
+    assert history.incremental_since(10, refresh_recent=3) == '2025-01-08T00:00:00.000Z'
+
+
+def test_incremental_once_a_full_scrape_reached_the_end_of_the_profile() -> None:
+    history = InstagramPostHistory()
+    # 5 posts exist, 2 of them were skipped by the tool, so only 3 are stored
+    history.merge([make_post(day) for day in range(1, 4)])
+    history.record_full_scrape(results_limit=30, results=5)
+
+    assert history.reached_end
+    assert history.incremental_since(30) == '2025-01-03T00:00:00.000Z'
+    assert history.incremental_since(100) == '2025-01-03T00:00:00.000Z'
+
+
+class StubPostStore:
+    def __init__(self) -> None:
+        self.histories: dict[str, InstagramPostHistory] = {}
+
+    async def get(self, handle: str) -> InstagramPostHistory:
+        return self.histories.get(handle, InstagramPostHistory()).model_copy(deep=True)
+
+    async def save(self, handle: str, history: InstagramPostHistory) -> None:
+        self.histories[handle] = history
+
+
+class StubApifyClient:
+    """Instagram scraper returning `items` for every run, recording the run inputs."""
+
+    def __init__(self, items: list[dict]) -> None:
+        self.items = items
+        self.run_inputs: list[dict] = []
+
+    def actor(self, actor_id: str) -> SimpleNamespace:
+        async def start(run_input: dict, timeout_secs: int | None = None) -> dict:
+            self.run_inputs.append(run_input)
+            return {'id': f'run-{len(self.run_inputs)}'}
+
+        return SimpleNamespace(start=start)
+
+    def run(self, run_id: str) -> SimpleNamespace:
+        async def wait_for_finish(wait_secs: int | None = None) -> dict:
+            return {'id': run_id, 'status': 'SUCCEEDED', 'defaultDatasetId': 'dataset', 'stats': {}}
+
+        return SimpleNamespace(wait_for_finish=wait_for_finish)
+
+    def dataset(self, dataset_id: str) -> SimpleNamespace:
+        async def list_items() -> SimpleNamespace:
+            return SimpleNamespace(items=self.items)
+
+        return SimpleNamespace(list_items=list_items)
+
+
+def test_profile_with_few_usable_posts_is_not_scraped_in_full_again(monkeypatch: pytest.MonkeyPatch) -> None:
+    items = [
+        {'url': 'https://www.instagram.com/p/2/', 'likesCount': 5, 'commentsCount': 1,
+         'timestamp': '2025-01-02T00:00:00.000Z'},
+        # Skipped by the tool, it has no likes
+        {'url': 'https://www.instagram.com/p/1/', 'likesCount': 0, 'commentsCount': 0,
+         'timestamp': '2025-01-01T00:00:00.000Z'},
+    ]
+    client = StubApifyClient(items)
+    post_store = StubPostStore()
+    monkeypatch.setattr(src.tools, 'Actor', SimpleNamespace(log=Actor.log, apify_client=client))
+
+    async def open_post_store() -> StubPostStore:
+        return post_store
+
+    monkeypatch.setattr(src.tools.InstagramPostStore, 'open', open_post_store)
+
+    async def scrape_twice() -> None:
+        for _ in range(2):
+            await tool_scrape_instagram_profile_posts.ainvoke({'handle': 'nasa', 'max_posts': 30})
+
+    asyncio.run(scrape_twice())
+
+    assert 'onlyPostsNewerThan' not in client.run_inputs[0]
+    assert client.run_inputs[1]['onlyPostsNewerThan'] == '2025-01-02T00:00:00.000Z'
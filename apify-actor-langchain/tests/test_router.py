@@ -0,0 +1,154 @@
+"""Tests of the deterministic fast-path router."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from src.budget import BudgetController, QueryBudget
+from src.models import InstagramPost, YCCompany
+from src.router import _format_result, route_query, run_fast_path, select_model
+from src.tools import tool_calculator_sum, tool_scrape_instagram_profile_posts, tool_scrape_yc_company
+
+
+@pytest.mark.parametrize(
+    ('query', 'numbers'),
+    [
+        ('What is 100 + 250 + 375?', [100, 250, 375]),
+        ('calculate 1+2', [1, 2]),
+        ("what's -5 + 10", [-5, 10]),
+        ('3 + 4 =', [3, 4]),
+    ],
+)
+def test_sum_route(query: str, numbers: list[int]) -> None:
+    route = route_query(query)
+
+    assert route is not None
+    assert route.tool is tool_calculator_sum
+    assert route.args == {'numbers': numbers}
+
+
+@pytest.mark.parametrize(
+    ('query', 'args'),
+    [
+        ('scrape @openai', {'handle': 'openai'}),
+        ('scrape @openai.', {'handle': 'openai'}),
+        ('Scrape the latest 10 posts from @open.ai on Instagram', {'handle': 'open.ai', 'max_posts': 10}),
+        ('scrape 5 posts of @nasa', {'handle': 'nasa', 'max_posts': 5}),
+    ],
+)
+def test_instagram_route(query: str, args: dict) -> None:
+    route = route_query(query)
+
+    assert route is not None
+    assert route.tool is tool_scrape_instagram_profile_posts
+    assert route.args == args
+
+
+@pytest.mark.parametrize(
+    ('query', 'batch'),
+    [
+        ('YC batch W25', 'W25'),
+        ('list y combinator batch Winter 2025 companies', 'W25'),
+        ('show the YC batch s24', 'S24'),
+    ],
+)
+def test_yc_batch_route(query: str, batch: str) -> None:
+    route = route_query(query)
+
+    assert route is not None
+    assert route.tool is tool_scrape_yc_company
+    assert route.args == {'company_url': f'https://www.ycombinator.com/companies?batch={batch}'}
+
+
+@pytest.mark.parametrize(
+    'query',
+    [
+        'What is the weather today?',
+        'Research companies in YC W25',
+        'What is 2 * 3?',
+        'Get the total likes and comments for latest 10 posts on @openai Instagram',
+        'scrape @openai and @nasa',
+    ],
+)
+def test_no_route(query: str) -> None:
+    assert route_query(query) is None
+
+
+def test_select_model_keeps_model_without_cheap_model() -> None:
+    assert select_model('add 100 plus 250 please', 'gpt-4.1') == 'gpt-4.1'
+
+
+@pytest.mark.parametrize(
+    ('query', 'expected'),
+    [
+        ('add 100 plus 250 please', 'gpt-4o-mini'),
+        ('scrape latest posts of @openai please', 'gpt-4o-mini'),
+        ('Research companies in YC W25', 'gpt-4.1'),
+        ('Get the total likes for latest 10 posts on @nasa Instagram', 'gpt-4.1'),
+    ],
+)
+def test_select_model_with_cheap_model(query: str, expected: str) -> None:
+    assert select_model(query, 'gpt-4.1', 'gpt-4o-mini') == expected
+
+
+def test_format_sum() -> None:
+    response, message = _format_result(725)
+
+    assert response.total_likes == 0
+    assert response.most_popular_posts == []
+    assert message == 'The sum is 725.'
+
+
+def test_format_instagram_posts() -> None:
+    posts = [
+        InstagramPost(url=f'https://instagram.com/p/{day}', likes=likes, comments=comments, timestamp=f'2025-01-0{day}')
+        for day, likes, comments in [(1, 10, 2), (2, 30, 1), (3, 5, 40), (4, 1, 1), (5, 2, 2), (6, 3, 3)]
+    ]
+
+    response, message = _format_result(posts)
+
+    assert response.total_likes == 51
+    assert response.total_comments == 49
+    # The top 5 posts by likes + comments, like the partial output of an exhausted budget
+    assert [post.url for post in response.most_popular_posts] == [
+        'https://instagram.com/p/3',
+        'https://instagram.com/p/2',
+        'https://instagram.com/p/1',
+        'https://instagram.com/p/6',
+        'https://instagram.com/p/5',
+    ]
+    budget = BudgetController(QueryBudget())
+    budget.record_posts(posts)
+    assert budget.partial_output() == response
+    assert 'Scraped 6 posts' in message
+    assert 'The most popular post is https://instagram.com/p/3.' in message
+
+
+def test_format_yc_companies() -> None:
+    companies = [
+        YCCompany(company_id=1, company_name='Acme', short_description='Rockets'),
+        YCCompany(company_id=2, company_name='Globex'),
+    ]
+
+    _, message = _format_result(companies)
+
+    assert message.splitlines() == ['Found 2 companies:', '- Acme: Rockets', '- Globex: no description']
+
+
+def test_format_empty_result() -> None:
+    _, message = _format_result([])
+
+    assert message == 'The tool returned no results.'
+
+
+def test_run_fast_path_sum() -> None:
+    response, message = asyncio.run(run_fast_path('What is 100 + 250 + 375?'))
+
+    assert message == 'The sum is 725.'
+    assert response.total_likes == 0
+
+
+def test_run_fast_path_no_route() -> None:
+    assert asyncio.run(run_fast_path('Tell me about the startup landscape')) is None
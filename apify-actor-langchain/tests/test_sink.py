@@ -0,0 +1,104 @@
+"""Tests of the buffered result sink, using stub storages."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+from src.sink import ResultSink, SinkConfig
+
+
+class StubDataset:
+    def __init__(self, failures: int = 0, delay_secs: float = 0) -> None:
+        self.failures = failures
+        self.delay_secs = delay_secs
+        self.items: list[dict] = []
+
+    async def push_data(self, data: list[dict]) -> None:
+        await asyncio.sleep(self.delay_secs)
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('dataset unavailable')
+        self.items.extend(data)
+
+
+class StubKeyValueStore:
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+
+    async def set_value(self, key: str, value: Any, content_type: str | None = None) -> None:
+        self.values[key] = value
+
+
+def make_sink(dataset: StubDataset, **config: Any) -> ResultSink:
+    return ResultSink(SinkConfig(retry_backoff_secs=0, **config), dataset, StubKeyValueStore())
+
+
+def test_records_are_written_on_close() -> None:
+    dataset = StubDataset()
+
+    async def write() -> None:
+        async with make_sink(dataset) as sink:
+            await sink.push_data([{'n': 1}, {'n': 2}])
+            await sink.set_value('response.txt', 'Hello')
+
+    asyncio.run(write())
+
+    assert dataset.items == [{'n': 1}, {'n': 2}]
+
+
+def test_failed_writes_are_retried() -> None:
+    dataset = StubDataset(failures=2)
+
+    async def write() -> None:
+        async with make_sink(dataset, max_retries=2) as sink:
+            await sink.push_data({'n': 1})
+
+    asyncio.run(write())
+
+    assert dataset.items == [{'n': 1}]
+
+
+def test_close_raises_when_the_final_flush_fails() -> None:
+    dataset = StubDataset(failures=10)
+
+    async def write() -> None:
+        async with make_sink(dataset, max_retries=2) as sink:
+            await sink.push_data({'n': 1})
+
+    with pytest.raises(RuntimeError, match='1 dataset record'):
+        asyncio.run(write())
+    assert dataset.failures == 7
+
+
+def test_records_of_a_failed_background_flush_are_written_later() -> None:
+    dataset = StubDataset(failures=1)
+
+    async def write() -> None:
+        async with make_sink(dataset, max_records=1, max_retries=0) as sink:
+            await sink.push_data({'n': 1})
+            # Let the background flush fail, the record is kept for the next flush
+            await asyncio.sleep(0.05)
+            assert sink.buffered == 1
+            await sink.push_data({'n': 2})
+
+    asyncio.run(write())
+
+    assert dataset.items == [{'n': 1}, {'n': 2}]
+
+
+def test_close_raises_when_failed_records_did_not_fit_into_the_buffer() -> None:
+    dataset = StubDataset(failures=1, delay_secs=0.05)
+
+    async def write() -> None:
+        async with make_sink(dataset, max_records=2, max_buffered_records=2, max_retries=0) as sink:
+            await sink.push_data([{'n': 1}, {'n': 2}])
+            await asyncio.sleep(0.01)
+            # The buffer fills up again while the flush is failing, so the failed records do not fit back
+            await sink.push_data([{'n': 3}, {'n': 4}])
+
+    with pytest.raises(RuntimeError, match='dropped 2 record'):
+        asyncio.run(write())
+    assert dataset.items == [{'n': 3}, {'n': 4}]
@@ -0,0 +1,61 @@
+"""Tests of the research worker, using a stubbed agent."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+
+import src.worker
+from src.job_queue import JobQueue
+from src.worker import process_job
+
+
+def test_job_is_cancelled_when_its_lease_is_lost(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    cancelled = []
+
+    async def slow_answer_query(*args: object, **kwargs: object) -> None:
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            cancelled.append(True)
+            raise
+
+    monkeypatch.setattr(src.worker, 'answer_query', slow_answer_query)
+    queue = JobQueue(tmp_path / 'queue.sqlite3')
+    queue.enqueue('query')
+    job = queue.claim('worker-a', visibility_timeout_secs=0.3)
+    # Another worker took the job over
+    queue._connection.execute("UPDATE jobs SET lease_owner = 'worker-b'")
+
+    started_at = time.monotonic()
+    asyncio.run(process_job(queue, job, 'worker-a', {}, visibility_timeout_secs=0.3))
+
+    assert time.monotonic() - started_at < 5
+    assert cancelled == [True]
+    job = queue.get(job.id)
+    assert job.status == 'running'
+    assert job.lease_owner == 'worker-b'
+    assert job.error is None
+    queue.close()
+
+
+def test_lease_is_extended_while_the_job_runs(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    async def slow_answer_query(*args: object, **kwargs: object) -> None:
+        await asyncio.sleep(0.5)
+        raise RuntimeError('boom')
+
+    monkeypatch.setattr(src.worker, 'answer_query', slow_answer_query)
+    queue = JobQueue(tmp_path / 'queue.sqlite3', retry_backoff_secs=0)
+    queue.enqueue('query')
+    job = queue.claim('worker-a', visibility_timeout_secs=0.3)
+
+    asyncio.run(process_job(queue, job, 'worker-a', {}, visibility_timeout_secs=0.3))
+
+    # The lease outlived the visibility timeout, so the failure was recorded by the worker holding it
+    job = queue.get(job.id)
+    assert job.status == 'queued'
+    assert job.error == 'RuntimeError: boom'
+    queue.close()
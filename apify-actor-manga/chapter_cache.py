@@ -0,0 +1,338 @@
+"""Content-addressed local cache of downloaded manga chapter pages.
+
+Layout of the cache directory:
+
+    objects/<hash[:2]>/<hash>                       page images, stored once per SHA-256 of their content
+    chapters/<series>/<language>/<chapter>.json     ordered page hashes of one chapter
+
+Identical pages (credits, blank pages, re-uploads) are stored once. CBZ and PDF packages are assembled
+straight from the cached page files. Once a request is packaged, `evict()` removes the least recently used
+chapters until the objects fit into `max_bytes` and deletes pages no other chapter references. Eviction
+is never triggered while storing chapters, so it cannot remove chapters of the request being assembled.
+"""
+
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import time
+import zipfile
+from collections import Counter
+from pathlib import Path
+
+PDF_COLOR_SPACES = {1: '/DeviceGray', 3: '/DeviceRGB', 4: '/DeviceCMYK'}
+
+# Default size limit of the cached page images (2 GiB)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3
+
+# Pages no chapter references are only deleted once they are this old, they may belong to a chapter that
+# another process is storing
+ORPHAN_GRACE_SECS = 3600
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif', '.avif')
+
+
+def series_key(url):
+    """Turn a manga URL into a filesystem-safe series key."""
+    url = re.sub(r'^https?://(www\.)?', '', url.split('?')[0]).strip('/')
+    return re.sub(r'[^a-zA-Z0-9._-]+', '_', url)
+
+
+def chapter_key(chapter):
+    """Format a chapter number as used in the cache, e.g. 216 -> "216", 10.5 -> "10.5"."""
+    return format(float(chapter), 'g')
+
+
+def chapter_ranges(chapters):
+    """Group sorted integer chapter numbers into contiguous (start, end) ranges."""
+    ranges = []
+    for chapter in sorted(chapters):
+        if ranges and chapter == ranges[-1][1] + 1:
+            ranges[-1][1] = chapter
+        else:
+            ranges.append([chapter, chapter])
+    return [tuple(chapter_range) for chapter_range in ranges]
+
+
+def copy_file(source, target_file):
+    """Append `source` to the open binary `target_file`, zero-copy with `os.sendfile` on Linux.
+
+    Other platforms (macOS only supports sendfile to sockets) and file systems rejecting sendfile fall back
+    to a buffered copy.
+    """
+    target_file.flush()
+    size = os.path.getsize(source)
+    with open(source, 'rb') as source_file:
+        offset = 0
+        if sys.platform == 'linux':
+            try:
+                while offset < size:
+                    sent = os.sendfile(target_file.fileno(), source_file.fileno(), offset, size - offset)
+                    if sent == 0:
+                        break
+                    offset += sent
+            except OSError:
+                pass
+            # sendfile writes through the file descriptor, move the Python file object past the data
+            target_file.seek(0, os.SEEK_END)
+        if offset < size:
+            source_file.seek(offset)
+            shutil.copyfileobj(source_file, target_file)
+    return size
+
+
+def jpeg_info(path):
+    """Return (width, height, components) of a baseline or progressive JPEG by reading its SOF marker."""
+    with open(path, 'rb') as f:
+        if f.read(2) != b'\xff\xd8':
+            raise ValueError(f'{path} is not a JPEG file')
+        while True:
+            marker = f.read(2)
+            if len(marker) < 2 or marker[0] != 0xFF:
+                raise ValueError(f'No frame header found in {path}')
+            length = int.from_bytes(f.read(2), 'big')
+            if 0xC0 <= marker[1] <= 0xCF and marker[1] not in (0xC4, 0xC8, 0xCC):
+                f.read(1)
+                height = int.from_bytes(f.read(2), 'big')
+                width = int.from_bytes(f.read(2), 'big')
+                components = f.read(1)[0]
+                return width, height, components
+            f.seek(length - 2, os.SEEK_CUR)
+
+
+class ChapterCache:
+    """On-disk cache of chapter pages keyed by series, chapter, language and page hash."""
+
+    def __init__(self, root, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.objects_dir = self.root / 'objects'
+        self.chapters_dir = self.root / 'chapters'
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        self.chapters_dir.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Pages and chapters
+    # ------------------------------------------------------------------
+
+    def _object_path(self, page_hash):
+        return self.objects_dir / page_hash[:2] / page_hash
+
+    def _manifest_path(self, series, chapter, language):
+        return self.chapters_dir / series / language / f'{chapter_key(chapter)}.json'
+
+    def put_page(self, data, extension='.jpg'):
+        """Store a page image and return its content hash. Pages already cached are not written again."""
+        page_hash = hashlib.sha256(data).hexdigest() + extension.lower()
+        path = self._object_path(page_hash)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write to a temporary file first so a crash never leaves a truncated page behind
+            tmp_path = path.with_name(path.name + '.tmp')
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+        return page_hash
+
+    def put_chapter(self, series, chapter, language, pages):
+        """Store the pages of a chapter, given as (file name, bytes) tuples in reading order.
+
+        Raises:
+            ValueError: If the chapter has no pages.
+        """
+        if not pages:
+            raise ValueError(f'Chapter {chapter_key(chapter)} of {series} has no pages')
+        page_hashes = [
+            self.put_page(data, os.path.splitext(name)[1] or '.jpg')
+            for name, data in pages
+        ]
+        manifest_path = self._manifest_path(series, chapter, language)
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps({
+            'series': series,
+            'chapter': chapter_key(chapter),
+            'language': language,
+            'pages': page_hashes,
+        }))
+
+    def put_cbz(self, series, chapter, language, data):
+        """Unpack a CBZ archive and store its pages as a chapter.
+
+        Raises:
+            ValueError: If the archive contains no page images.
+        """
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            names = sorted(
+                name for name in archive.namelist()
+                if name.lower().endswith(IMAGE_EXTENSIONS)
+            )
+            self.put_chapter(series, chapter, language, [(name, archive.read(name)) for name in names])
+
+    def has_chapter(self, series, chapter, language):
+        """Whether all pages of the chapter are cached."""
+        if not (manifest_path := self._manifest_path(series, chapter, language)).exists():
+            return False
+        pages = json.loads(manifest_path.read_text())['pages']
+        # Manifests without pages (written by older versions) never count as cached
+        return bool(pages) and all(self._object_path(page_hash).exists() for page_hash in pages)
+
+    def missing_chapters(self, series, language, chapters):
+        """Return the chapters that are not cached yet."""
+        return [chapter for chapter in chapters if not self.has_chapter(series, chapter, language)]
+
+    def page_paths(self, series, chapter, language):
+        """Return the cached page files of a chapter in reading order and mark it as recently used."""
+        manifest_path = self._manifest_path(series, chapter, language)
+        pages = json.loads(manifest_path.read_text())['pages']
+        os.utime(manifest_path)
+        return [self._object_path(page_hash) for page_hash in pages]
+
+    # ------------------------------------------------------------------
+    # Eviction
+    # ------------------------------------------------------------------
+
+    def _page_sizes(self):
+        """Return the size of every cached page, skipping pages other processes are still writing."""
+        return {
+            path.name: path.stat().st_size
+            for path in self.objects_dir.glob('*/*')
+            if not path.name.endswith('.tmp')
+        }
+
+    def size(self):
+        """Total size of the cached page images in bytes."""
+        return sum(self._page_sizes().values())
+
+    def evict(self):
+        """Evict least recently used chapters until the cached pages fit into `max_bytes`.
+
+        Call it after packaging, the cache may grow beyond `max_bytes` while the chapters of a request are
+        stored. The cache is scanned once, freed bytes are subtracted as chapters are evicted.
+        """
+        sizes = self._page_sizes()
+        total = sum(sizes.values())
+        if total <= self.max_bytes:
+            return
+
+        manifests = sorted(self.chapters_dir.glob('*/*/*.json'), key=lambda path: path.stat().st_mtime)
+        pages = {manifest_path: set(json.loads(manifest_path.read_text())['pages']) for manifest_path in manifests}
+        references = Counter(page_hash for page_hashes in pages.values() for page_hash in page_hashes)
+
+        # Pages left behind by interrupted downloads. Recent ones may belong to a chapter being stored right now.
+        orphans_before = time.time() - ORPHAN_GRACE_SECS
+        for page_hash, size in sizes.items():
+            if page_hash not in references and self._object_path(page_hash).stat().st_mtime < orphans_before:
+                total -= self._delete_page(page_hash, size)
+
+        for manifest_path in manifests:
+            if total <= self.max_bytes:
+                break
+            manifest_path.unlink()
+            print(f'🗑️  Evicted chapter {manifest_path.relative_to(self.chapters_dir)}')
+            for page_hash in pages[manifest_path]:
+                references[page_hash] -= 1
+                if not references[page_hash] and page_hash in sizes:
+                    total -= self._delete_page(page_hash, sizes[page_hash])
+
+    def _delete_page(self, page_hash, size):
+        """Delete a cached page and return the number of bytes freed."""
+        try:
+            self._object_path(page_hash).unlink()
+        except FileNotFoundError:
+            return 0
+        return size
+
+    # ------------------------------------------------------------------
+    # Packaging
+    # ------------------------------------------------------------------
+
+    def write_cbz(self, series, language, chapters, output_path):
+        """Assemble a CBZ archive of the chapters from the cached pages.
+
+        Pages are already compressed images, so they are stored without recompression and streamed from
+        disk into the archive.
+        """
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        with zipfile.ZipFile(output_path, 'w', compression=zipfile.ZIP_STORED) as archive:
+            for chapter in chapters:
+                for number, path in enumerate(self.page_paths(series, chapter, language), start=1):
+                    extension = os.path.splitext(path.name)[1]
+                    archive.write(path, f'{chapter_key(chapter)}/{number:04d}{extension}')
+        return output_path
+
+    def write_pdf(self, series, language, chapters, output_path):
+        """Assemble a PDF of the chapters from the cached pages.
+
+        JPEG pages are embedded as they are (DCTDecode), so every page is copied byte for byte from the
+        cache into the PDF with `os.sendfile` and never decoded.
+
+        Raises:
+            ValueError: If a page is not a JPEG image.
+        """
+        pages = [
+            path
+            for chapter in chapters
+            for path in self.page_paths(series, chapter, language)
+        ]
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+
+        # Object 1 is the catalog, 2 the page tree, then per page: page, content stream, image
+        offsets = {}
+        with open(output_path, 'wb') as f:
+            def write_object(number, body):
+                offsets[number] = f.tell()
+                f.write(f'{number} 0 obj\n'.encode() + body + b'\nendobj\n')
+
+            f.write(b'%PDF-1.4\n%\xe2\xe3\xcf\xd3\n')
+            page_numbers = [3 + 3 * i for i in range(len(pages))]
+            write_object(1, b'<< /Type /Catalog /Pages 2 0 R >>')
+            kids = ' '.join(f'{number} 0 R' for number in page_numbers)
+            write_object(2, f'<< /Type /Pages /Kids [{kids}] /Count {len(pages)} >>'.encode())
+
+            for page_number, path in zip(page_numbers, pages):
+                width, height, components = jpeg_info(path)
+                write_object(page_number, (
+                    f'<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {width} {height}] '
+                    f'/Resources << /XObject << /Im0 {page_number + 2} 0 R >> >> '
+                    f'/Contents {page_number + 1} 0 R >>'
+                ).encode())
+                content = f'q {width} 0 0 {height} 0 0 cm /Im0 Do Q'.encode()
+                write_object(page_number + 1, (
+                    f'<< /Length {len(content)} >>\nstream\n'.encode() + content + b'\nendstream'
+                ))
+
+                offsets[page_number + 2] = f.tell()
+                f.write((
+                    f'{page_number + 2} 0 obj\n<< /Type /XObject /Subtype /Image /Width {width} '
+                    f'/Height {height} /ColorSpace {PDF_COLOR_SPACES[components]} /BitsPerComponent 8 /Filter /DCTDecode '
+                    f'/Length {os.path.getsize(path)} >>\nstream\n'
+                ).encode())
+                copy_file(path, f)
+                f.write(b'\nendstream\nendobj\n')
+
+            xref_offset = f.tell()
+            f.write(f'xref\n0 {len(offsets) + 1}\n0000000000 65535 f \n'.encode())
+            for number in sorted(offsets):
+                f.write(f'{offsets[number]:010d} 00000 n \n'.encode())
+            f.write((
+                f'trailer\n<< /Size {len(offsets) + 1} /Root 1 0 R >>\n'
+                f'startxref\n{xref_offset}\n%%EOF\n'
+            ).encode())
+        return output_path
+
+    def package(self, series, language, chapters, output_format, output_dir):
+        """Assemble the chapters into a single CBZ or PDF file in `output_dir`."""
+        chapters = list(chapters)
+        name = f'{series}_{chapter_key(chapters[0])}-{chapter_key(chapters[-1])}_{language}.{output_format}'
+        output_path = Path(output_dir) / name
+        started_at = time.monotonic()
+        if output_format == 'pdf':
+            self.write_pdf(series, language, chapters, output_path)
+        else:
+            self.write_cbz(series, language, chapters, output_path)
+        print(f'📦 Packed {len(chapters)} chapter(s) into {output_path} in {time.monotonic() - started_at:.2f}s')
+        return output_path
@@ -1,6 +1,10 @@
 from apify_client import ApifyClient
 from dotenv import load_dotenv
+from pathlib import Path
 import os
+import re
+
+from chapter_cache import ChapterCache, chapter_ranges, series_key
 
 # Load environment variables from .env file
 load_dotenv()
@@ -17,12 +21,70 @@ run_input = {
     "format": "cbz",
 }
 
-# Run the Actor and wait for it to finish
-run = client.actor("panjan/comick-io").call(run_input=run_input)
+# Local cache of downloaded chapter pages, only chapters missing from it trigger an Actor run
+cache = ChapterCache(
+    Path(__file__).parent / 'cache',
+    max_bytes=int(os.getenv('MANGA_CACHE_MAX_BYTES', 2 * 1024 ** 3)),
+)
+series = series_key(run_input["url"])
+language = run_input["language"]
+chapters = range(run_input["startingChapter"], run_input["endingChapter"] + 1)
+
+missing = cache.missing_chapters(series, language, chapters)
+print(f"📚 {len(chapters) - len(missing)} of {len(chapters)} chapter(s) already cached")
+
+
+def iterate_store_records(store_client):
+    """Yield (key, bytes) of all records in a key-value store."""
+    exclusive_start_key = None
+    while True:
+        page = store_client.list_keys(exclusive_start_key=exclusive_start_key)
+        for item in page["items"]:
+            if record := store_client.get_record_as_bytes(item["key"]):
+                yield item["key"], record["value"]
+        if not page.get("isTruncated"):
+            return
+        exclusive_start_key = page["nextExclusiveStartKey"]
+
+
+def record_chapter(key, start, end):
+    """Return the chapter number a record key identifies within [start, end], or None if there is not exactly one."""
+    candidates = {float(number) for number in re.findall(r"\d+(?:\.\d+)?", key) if start <= float(number) <= end}
+    return candidates.pop() if len(candidates) == 1 else None
+
+
+for start, end in chapter_ranges(missing):
+    # Run the Actor and wait for it to finish, always as CBZ so the pages can be cached
+    run = client.actor("panjan/comick-io").call(
+        run_input={**run_input, "startingChapter": start, "endingChapter": end, "format": "cbz"}
+    )
+
+    # Fetch and print Actor results from the run's dataset (if there are any)
+    print("💾 Check your data here: https://console.apify.com/storage/datasets/" + run["defaultDatasetId"])
+    for item in client.dataset(run["defaultDatasetId"]).iterate_items():
+        print(item)
+
+    # The packaged chapters are stored as records of the run's key-value store, one CBZ per chapter
+    for key, data in iterate_store_records(client.key_value_store(run["defaultKeyValueStoreId"])):
+        if not data.startswith(b"PK"):
+            continue
+        if (chapter := record_chapter(key, start, end)) is None:
+            print(f"⚠️  Skipping record {key}, it does not identify a single chapter in {start}-{end}")
+            continue
+        try:
+            cache.put_cbz(series, chapter, language, data)
+        except ValueError as e:
+            print(f"⚠️  Skipping record {key}: {e}")
+            continue
+        print(f"✓ Cached chapter {chapter:g} from record {key}")
+
+# Assemble the requested format from the cached pages
+if missing := cache.missing_chapters(series, language, chapters):
+    print(f"⚠️  Chapters not available: {', '.join(str(chapter) for chapter in missing)}")
+elif chapters:
+    cache.package(series, language, chapters, run_input["format"], Path(__file__).parent / 'output')
 
-# Fetch and print Actor results from the run's dataset (if there are any)
-print("💾 Check your data here: https://console.apify.com/storage/datasets/" + run["defaultDatasetId"])
-for item in client.dataset(run["defaultDatasetId"]).iterate_items():
-    print(item)
+# Evict only now, so chapters of this request are not evicted before they are packaged
+cache.evict()
 
 # 📚 Want to learn more 📖? Go to → https://docs.apify.com/api/client/python/docs/quick-start
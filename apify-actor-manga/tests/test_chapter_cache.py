@@ -0,0 +1,143 @@
+"""Tests of the content-addressed chapter cache."""
+
+import io
+import os
+import re
+import time
+import zipfile
+
+import pytest
+
+from chapter_cache import ChapterCache, chapter_key, chapter_ranges, copy_file, jpeg_info
+
+
+def make_jpeg(width, height, payload=b''):
+    """Minimal JPEG: SOI, a baseline frame header with 3 components, some payload and EOI."""
+    frame = b'\x08' + height.to_bytes(2, 'big') + width.to_bytes(2, 'big') + b'\x03' + b'\x01\x11\x00' * 3
+    return b'\xff\xd8' + b'\xff\xc0' + (len(frame) + 2).to_bytes(2, 'big') + frame + payload + b'\xff\xd9'
+
+
+def make_cbz(pages):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as archive:
+        for name, data in pages:
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return ChapterCache(tmp_path / 'cache')
+
+
+def test_chapter_helpers():
+    assert chapter_key(216) == '216'
+    assert chapter_key(10.5) == '10.5'
+    assert chapter_ranges([5, 1, 2, 3, 7, 8]) == [(1, 3), (5, 5), (7, 8)]
+
+
+def test_identical_pages_are_stored_once(cache):
+    credits = make_jpeg(10, 10, b'credits')
+    cache.put_chapter('series', 1, 'en', [('1.jpg', make_jpeg(10, 10, b'one')), ('2.jpg', credits)])
+    cache.put_chapter('series', 2, 'en', [('1.jpg', make_jpeg(10, 10, b'two')), ('2.jpg', credits)])
+
+    assert len(list(cache.objects_dir.glob('*/*'))) == 3
+    assert cache.page_paths('series', 1, 'en')[1] == cache.page_paths('series', 2, 'en')[1]
+
+
+def test_missing_chapters(cache):
+    cache.put_chapter('series', 1, 'en', [('1.jpg', b'page')])
+
+    assert cache.has_chapter('series', 1, 'en')
+    assert not cache.has_chapter('series', 1, 'de')
+    assert cache.missing_chapters('series', 'en', range(1, 4)) == [2, 3]
+
+    # A chapter with a deleted page is no longer cached
+    cache.page_paths('series', 1, 'en')[0].unlink()
+    assert cache.missing_chapters('series', 'en', [1]) == [1]
+
+
+def test_chapter_without_pages_is_refused(cache):
+    with pytest.raises(ValueError):
+        cache.put_cbz('series', 1, 'en', make_cbz([('ComicInfo.xml', b'<ComicInfo/>')]))
+
+    assert cache.missing_chapters('series', 'en', [1]) == [1]
+
+
+def test_cbz_round_trip(cache, tmp_path):
+    pages = [('p02.png', b'second'), ('p01.jpg', b'first'), ('ComicInfo.xml', b'<ComicInfo/>')]
+    cache.put_cbz('series', 3, 'en', make_cbz(pages))
+
+    output_path = cache.package('series', 'en', [3], 'cbz', tmp_path / 'output')
+
+    assert output_path.name == 'series_3-3_en.cbz'
+    with zipfile.ZipFile(output_path) as archive:
+        assert archive.namelist() == ['3/0001.jpg', '3/0002.png']
+        assert archive.read('3/0001.jpg') == b'first'
+        assert archive.read('3/0002.png') == b'second'
+        assert all(info.compress_type == zipfile.ZIP_STORED for info in archive.infolist())
+
+
+def test_pdf_embeds_pages_with_a_valid_xref_table(cache, tmp_path):
+    first, second = make_jpeg(100, 200, b'first'), make_jpeg(300, 150, b'second')
+    cache.put_chapter('series', 1, 'en', [('1.jpg', first)])
+    cache.put_chapter('series', 2, 'en', [('1.jpg', second)])
+
+    data = cache.package('series', 'en', [1, 2], 'pdf', tmp_path / 'output').read_bytes()
+
+    assert data.startswith(b'%PDF-1.4')
+    assert first in data and second in data
+    assert b'/MediaBox [0 0 100 200]' in data and b'/MediaBox [0 0 300 150]' in data
+
+    xref_offset = int(re.search(rb'startxref\n(\d+)\n%%EOF', data).group(1))
+    assert data[xref_offset:].startswith(b'xref\n')
+    count = int(re.match(rb'xref\n0 (\d+)\n', data[xref_offset:]).group(1))
+    entries = re.findall(rb'(\d{10}) 00000 n \n', data[xref_offset:])
+    # Catalog, page tree and page, content stream and image per page
+    assert count == len(entries) + 1 == 2 + 3 * 2 + 1
+    for number, offset in enumerate(entries, start=1):
+        assert data[int(offset):].startswith(f'{number} 0 obj\n'.encode())
+
+
+def test_jpeg_info(tmp_path):
+    path = tmp_path / 'page.jpg'
+    path.write_bytes(make_jpeg(640, 480))
+    assert jpeg_info(path) == (640, 480, 3)
+
+    path.write_bytes(b'\x89PNG')
+    with pytest.raises(ValueError):
+        jpeg_info(path)
+
+
+def test_copy_file_appends_to_the_target(tmp_path, monkeypatch):
+    source = tmp_path / 'source'
+    source.write_bytes(os.urandom(100_000))
+    for platform in ('linux', 'darwin'):
+        monkeypatch.setattr('chapter_cache.sys.platform', platform)
+        target = tmp_path / f'target-{platform}'
+        with open(target, 'wb') as f:
+            f.write(b'head')
+            copy_file(source, f)
+            f.write(b'tail')
+        assert target.read_bytes() == b'head' + source.read_bytes() + b'tail'
+
+
+def test_eviction_removes_least_recently_used_chapters(tmp_path):
+    cache = ChapterCache(tmp_path / 'cache', max_bytes=2000)
+    shared = os.urandom(500)
+    for chapter in (1, 2, 3):
+        cache.put_chapter('series', chapter, 'en', [('1.jpg', os.urandom(1000)), ('2.jpg', shared)])
+    now = time.time()
+    for age, chapter in ((30, 1), (20, 2), (10, 3)):
+        os.utime(cache.chapters_dir / 'series' / 'en' / f'{chapter}.json', (now - age, now - age))
+    # Reading chapter 1 makes it the most recently used one
+    cache.page_paths('series', 1, 'en')
+    in_flight = cache.objects_dir / 'ff' / 'page.jpg.tmp'
+    in_flight.parent.mkdir(exist_ok=True)
+    in_flight.write_bytes(os.urandom(5000))
+
+    cache.evict()
+
+    assert cache.missing_chapters('series', 'en', [1, 2, 3]) == [2, 3]
+    assert cache.size() == 1500
+    assert in_flight.exists()